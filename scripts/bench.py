@@ -0,0 +1,376 @@
+"""
+Benchmarks for the simulation hot paths.
+
+Times link budget estimation, tessellation, receiver generation, path
+loss and sweeps on fixed synthetic inputs, recording wall time, peak
+memory and receivers per second, and compares them against a stored
+baseline to flag regressions.
+
+    python scripts/bench.py --save-baseline    # on the reference commit
+    python scripts/bench.py                    # after a change
+
+Timings depend on the machine, so a baseline should only be compared
+against runs on the same machine.
+
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import configparser
+import tracemalloc
+from collections import OrderedDict
+
+import numpy as np
+
+from dice.cli import load_config
+from dice.generate_hex import (calculate_polygons, get_site_layout_template,
+    produce_sites_and_site_areas)
+from dice.path_loss import path_loss_calculator
+from dice.sweep import SweepRunner, sweep_jobs
+from dice.system_simulator import SimulationManager
+
+from sim import generate_receivers
+
+CONFIG = configparser.ConfigParser()
+CONFIG.read(os.path.join(os.path.dirname(__file__), 'script_config.ini'))
+BASE_PATH = CONFIG['file_locations']['base_path']
+DATA_INTERMEDIATE = os.path.join(BASE_PATH, 'intermediate')
+
+SIM_CONFIG = load_config(os.path.join(os.path.dirname(__file__),
+    'sim_config.json'))
+
+PARAMETERS = SIM_CONFIG['parameters']
+MODULATION_AND_CODING_LUT = SIM_CONFIG['modulation_and_coding_lut']
+CONFIDENCE_INTERVALS = SIM_CONFIG['confidence_intervals']
+
+FULL_SPECTRUM_PORTFOLIO = [
+    (0.8, 10, '4G', '2x2'),
+    (1.7, 10, '4G', '2x2'),
+    (1.8, 1, '4G', '2x2'),
+    (1.9, 1, '4G', '2x2'),
+    (2.3, 1, '4G', '2x2'),
+    (2.5, 1, '4G', '2x2'),
+    (2.6, 10, '4G', '2x2'),
+    (3.5, 40, '5G', '4x4'),
+]
+
+GRID_SIZES = [50, 200, 500]
+
+SITE_RADIUS = 1000
+
+ORIGIN = (0, 0)
+UNPROJECTED_CRS = 'epsg:4326'
+PROJECTED_CRS = 'epsg:3857'
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name, unit='receivers'):
+    """
+
+    Register a benchmark. The decorated function sets up its inputs and
+    returns (run, items), where run is the callable timed and items the
+    number of `unit` it processes per call.
+
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, unit)
+        return setup
+    return register
+
+
+def site_layout(site_radius=SITE_RADIUS):
+    return produce_sites_and_site_areas(ORIGIN, site_radius, UNPROJECTED_CRS,
+        PROJECTED_CRS)
+
+
+def fixed_receivers(site_area, grid_size):
+    np.random.seed(42)
+    return generate_receivers(site_area, PARAMETERS, 1, grid_size)
+
+
+def make_receivers_benchmark(grid_size):
+
+    @benchmark('generate_receivers[{}]'.format(grid_size))
+    def setup():
+        transmitter, interfering_transmitters, site_area, int_site_areas = \
+            site_layout()
+
+        receivers = fixed_receivers(site_area, grid_size)
+
+        def run():
+            np.random.seed(42)
+            generate_receivers(site_area, PARAMETERS, 1, grid_size)
+
+        return run, len(receivers)
+
+
+def make_link_budget_benchmark(grid_size):
+
+    @benchmark('estimate_link_budget[{}]'.format(grid_size))
+    def setup():
+        transmitter, interfering_transmitters, site_area, int_site_areas = \
+            site_layout()
+
+        receivers = fixed_receivers(site_area, grid_size)
+
+        manager = SimulationManager(transmitter, interfering_transmitters,
+            'macro', receivers, site_area, PARAMETERS)
+
+        def run():
+            manager.estimate_link_budget(0.8, 10, '4G', 'macro', '2x2',
+                'urban', MODULATION_AND_CODING_LUT, PARAMETERS)
+
+        return run, len(receivers)
+
+
+for grid_size in GRID_SIZES:
+    make_receivers_benchmark(grid_size)
+    make_link_budget_benchmark(grid_size)
+
+
+@benchmark('estimate_link_budget_multiband[50]')
+def setup_multiband():
+    transmitter, interfering_transmitters, site_area, int_site_areas = \
+        site_layout()
+
+    receivers = fixed_receivers(site_area, 50)
+
+    manager = SimulationManager(transmitter, interfering_transmitters,
+        'macro', receivers, site_area, PARAMETERS)
+
+    def run():
+        manager.estimate_link_budget_multiband(FULL_SPECTRUM_PORTFOLIO,
+            'macro', 'urban', MODULATION_AND_CODING_LUT, PARAMETERS)
+
+    return run, len(receivers) * len(FULL_SPECTRUM_PORTFOLIO)
+
+
+@benchmark('calculate_polygons', unit='hexagons')
+def setup_polygons():
+    # a 100 x 100 km area of 500 m hexagons
+    def run():
+        return calculate_polygons(0, 0, 100000, 100000, 500)
+
+    vertices, centroids = run()
+
+    return run, len(centroids)
+
+
+@benchmark('path_loss_calculator', unit='paths')
+def setup_path_loss():
+    distance = np.random.RandomState(42).uniform(10, 40000, 1000000)
+
+    def run():
+        path_loss_calculator(distance, 0.8, PARAMETERS)
+
+    return run, len(distance)
+
+
+def make_sweep_benchmark(name, site_radii, spectrum_portfolio):
+
+    @benchmark(name)
+    def setup():
+        template = get_site_layout_template(ORIGIN, UNPROJECTED_CRS,
+            PROJECTED_CRS, grid_size=50)
+
+        runner = SweepRunner(template, PARAMETERS, MODULATION_AND_CODING_LUT,
+            CONFIDENCE_INTERVALS, report_interval=np.inf)
+
+        jobs = sweep_jobs(['urban'], ['macro'], site_radii, spectrum_portfolio)
+
+        def run():
+            for task_output, timings in runner.execute(jobs):
+                pass
+
+        receivers = len(template.receiver_mask.nonzero()[0])
+
+        return run, receivers * len(jobs)
+
+
+make_sweep_benchmark('sweep_single_radius', [SITE_RADIUS],
+    FULL_SPECTRUM_PORTFOLIO)
+make_sweep_benchmark('sweep_full_band', range(500, 5500, 500),
+    FULL_SPECTRUM_PORTFOLIO)
+
+
+def measure(setup, repeat):
+    """
+
+    Time a benchmark, then measure its peak memory in a separate, untimed
+    call so tracing does not slow the timings.
+
+    Returns
+    -------
+    result : OrderedDict
+        Wall times, peak memory and throughput of the benchmark.
+
+    """
+    run, items = setup()
+
+    # warm up caches and lazy imports
+    run()
+
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall_time = float(np.median(times))
+
+    return OrderedDict([
+        ('items', items),
+        ('wall_time_s', wall_time),
+        ('wall_time_min_s', min(times)),
+        ('peak_memory_mb', peak / 1e6),
+        ('items_per_s', items / wall_time if wall_time > 0 else None),
+    ])
+
+
+def run_benchmarks(names, repeat):
+    """
+
+    Run the named benchmarks, printing each result as it completes.
+
+    """
+    results = OrderedDict()
+
+    for name in names:
+        setup, unit = BENCHMARKS[name]
+        result = measure(setup, repeat)
+        result['unit'] = unit
+        results[name] = result
+
+        print('{:<36} {:>10.4f} s {:>10.1f} MB {:>14,.0f} {}/s'.format(
+            name, result['wall_time_s'], result['peak_memory_mb'],
+            result['items_per_s'] or 0, unit))
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+
+    Compare results against a baseline, returning a list of regressions
+    where wall time or peak memory grew by more than `threshold`.
+
+    """
+    regressions = []
+
+    print('\n{:<36} {:>12} {:>12}'.format('vs baseline', 'time', 'memory'))
+
+    for name, result in results.items():
+        if name not in baseline:
+            print('{:<36} {:>12}'.format(name, 'new'))
+            continue
+
+        ratios = []
+        for metric in ['wall_time_s', 'peak_memory_mb']:
+            reference = baseline[name][metric]
+            ratio = result[metric] / reference if reference else 1
+            ratios.append(ratio)
+            if ratio > 1 + threshold:
+                regressions.append((name, metric, ratio))
+
+        flag = ' REGRESSION' if any(ratio > 1 + threshold for ratio in ratios) \
+            else ''
+        print('{:<36} {:>11.2f}x {:>11.2f}x{}'.format(name, ratios[0],
+            ratios[1], flag))
+
+    return regressions
+
+
+def environment():
+    """
+
+    Describe the machine and code a benchmark ran on.
+
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short',
+            'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return OrderedDict([
+        ('timestamp', time.strftime('%Y-%m-%dT%H:%M:%S')),
+        ('commit', commit),
+        ('machine', platform.machine()),
+        ('processor', platform.processor()),
+        ('cpu_count', os.cpu_count()),
+        ('python', platform.python_version()),
+        ('numpy', np.__version__),
+    ])
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark the simulation hot paths.')
+    parser.add_argument('-k', '--filter', default='',
+        help='only run benchmarks whose name contains this string')
+    parser.add_argument('--repeat', type=int, default=5,
+        help='timed calls per benchmark (default 5)')
+    parser.add_argument('--baseline', default=os.path.join(DATA_INTERMEDIATE,
+        'benchmarks', 'baseline.json'), help='path of the baseline .json')
+    parser.add_argument('--save-baseline', action='store_true',
+        help='store these results as the baseline')
+    parser.add_argument('--output', help='also write the results to this .json')
+    parser.add_argument('--threshold', type=float, default=0.1,
+        help='fractional slowdown or memory growth flagged (default 0.1)')
+    parser.add_argument('--list', action='store_true',
+        help='list the benchmarks and exit')
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+
+    if args.list:
+        print('\n'.join(names))
+        return 0
+
+    report = OrderedDict([
+        ('environment', environment()),
+        ('results', run_benchmarks(names, args.repeat)),
+    ])
+
+    paths = [args.output] if args.output else []
+    if args.save_baseline:
+        paths.append(args.baseline)
+
+    for path in paths:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as report_file:
+            json.dump(report, report_file, indent=4)
+        print('Wrote {}'.format(path))
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    regressions = compare(report['results'], baseline['results'],
+        args.threshold)
+
+    if regressions:
+        print('\n{} regressions against the baseline from commit {}'.format(
+            len(regressions), baseline['environment']['commit']))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -37,6 +37,93 @@ DATA_INTERMEDIATE = os.path.join(BASE_PATH, 'intermediate')
 DATA_PROCESSED = os.path.join(BASE_PATH, 'processed')
 
 
+class GadmBoundaries(object):
+    """
+    GADM boundaries indexed by country.
+
+    The first time a level is used, its global shapefile is read once and
+    split into one GeoParquet file per GID_0, so each country is then a
+    small indexed read rather than a scan of the global layer.
+
+    Parameters
+    ----------
+    directory : string
+        Folder holding the gadm36_{level}.shp files.
+    cache_directory : string
+        Folder for the per-country GeoParquet files.
+
+    """
+    def __init__(self, directory=None, cache_directory=None):
+
+        self.directory = directory or os.path.join(DATA_RAW,
+            'gadm36_levels_shp')
+        self.cache_directory = cache_directory or os.path.join(
+            DATA_INTERMEDIATE, 'gadm36_by_country')
+
+
+    def country(self, iso3, level=0):
+        """
+        Return the boundaries of one country at a GADM level.
+
+        Parameters
+        ----------
+        iso3 : string
+            Three digit ISO country code (GID_0).
+        level : int
+            GADM level, from 0 (national) to 5.
+
+        Returns
+        -------
+        boundaries : GeoDataFrame
+            Boundaries of the country, empty if it has none at this level.
+
+        """
+        folder = self.partition(level)
+
+        path = os.path.join(folder, '{}.parquet'.format(iso3))
+        if not os.path.exists(path):
+            path = os.path.join(folder, '_empty.parquet')
+
+        return gpd.read_parquet(path)
+
+
+    def partition(self, level):
+        """
+        Split a level into one file per country, in a single read of the
+        global shapefile, unless this has already been done.
+
+        Returns
+        -------
+        folder : string
+            Folder of the per-country files for the level.
+
+        """
+        folder = os.path.join(self.cache_directory,
+            'gadm36_{}'.format(level))
+        complete = os.path.join(folder, '_SUCCESS')
+
+        if os.path.exists(complete):
+            return folder
+
+        path = os.path.join(self.directory, 'gadm36_{}.shp'.format(level))
+        layer = gpd.read_file(path)
+
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        layer.iloc[:0].to_parquet(os.path.join(folder, '_empty.parquet'))
+
+        for iso3, boundaries in layer.groupby('GID_0'):
+            boundaries.to_parquet(os.path.join(folder,
+                '{}.parquet'.format(iso3)))
+
+        # only marked complete once every country is written, so an
+        # interrupted split is redone
+        open(complete, 'w').close()
+
+        return folder
+
+
 def find_country_list(continent_list):
     """
     This function produces country information by continent.
@@ -75,7 +162,7 @@ def find_country_list(continent_list):
     return output
 
 
-def process_country_shapes(country):
+def process_country_shapes(country, boundaries=None):
     """
     Creates a single national boundary for the desired country.
 
@@ -83,6 +170,8 @@ def process_country_shapes(country):
     ----------
     country : string
         Three digit ISO country code.
+    boundaries : GadmBoundaries, optional
+        Indexed GADM boundaries, shared between countries.
 
     """
     iso3 = country['iso3']
@@ -96,10 +185,10 @@ def process_country_shapes(country):
         os.makedirs(path)
     shape_path = os.path.join(path, 'national_outline.shp')
 
-    path = os.path.join(DATA_RAW, 'gadm36_levels_shp', 'gadm36_0.shp')
-    countries = gpd.read_file(path)
+    if boundaries is None:
+        boundaries = GadmBoundaries()
 
-    single_country = countries[countries.GID_0 == iso3]
+    single_country = boundaries.country(iso3, 0)
 
     try:
         single_country['geometry'] = single_country.apply(
@@ -163,7 +252,7 @@ def drop_small_polygons(x):
     # print('there')
 
 
-def process_regions(country):
+def process_regions(country, boundaries=None):
     """
     Function for processing the lowest desired subnational
     regions for the chosen country.
@@ -172,10 +261,15 @@ def process_regions(country):
     ----------
     country : string
         Three digit ISO country code.
+    boundaries : GadmBoundaries, optional
+        Indexed GADM boundaries, shared between countries.
 
     """
     regions = []
 
+    if boundaries is None:
+        boundaries = GadmBoundaries()
+
     iso3 = country['iso3']
     level = country['regional_level']
 
@@ -191,11 +285,7 @@ def process_regions(country):
         if not os.path.exists(folder):
             os.mkdir(folder)
 
-        filename = 'gadm36_{}.shp'.format(regional_level)
-        path_regions = os.path.join(DATA_RAW, 'gadm36_levels_shp', filename)
-        regions = gpd.read_file(path_regions)
-
-        regions = regions[regions.GID_0 == iso3]
+        regions = boundaries.country(iso3, regional_level)
 
         if len(regions) == 0:
             print('{} has no regions at level {}'.format(iso3, regional_level))
@@ -479,6 +569,8 @@ if __name__ == '__main__':
 
     countries = find_country_list([])
 
+    boundaries = GadmBoundaries()
+
     for country in tqdm(countries):
 
         # if not country['iso3'] == 'ZWE':
@@ -509,10 +601,10 @@ if __name__ == '__main__':
         print('--Working on {}'.format(country['iso3']))
 
         # # print('Processing country boundary')
-        # process_country_shapes(country)
+        # process_country_shapes(country, boundaries)
 
         # # print('Processing regions')
-        # response = process_regions(country)
+        # response = process_regions(country, boundaries)
         # if response == 'All small shapes':
         #     # print(response)
         #     continue
@@ -22,8 +22,13 @@ from rtree import index
 
 from collections import OrderedDict
 
-from dice.generate_hex import produce_sites_and_site_areas
-from dice.system_simulator import SimulationManager
+from dice.generate_hex import (get_site_layout_template,
+    generate_grid_receiver_positions)
+from dice.system_simulator import SimulationManager, ReceiverSet
+from dice.results import LinkBudgetResults, PercentileAggregator
+from dice.sweep import SweepRunner, SweepManifest, sweep_jobs
+from dice.writers import (full_results_table, write_full_results_csv,
+    CsvFullResultsWriter, ParquetFullResultsWriter, LutWriter, lut_rows)
 
 np.random.seed(42)
 
@@ -32,7 +37,7 @@ CONFIG.read(os.path.join(os.path.dirname(__file__), 'script_config.ini'))
 BASE_PATH = CONFIG['file_locations']['base_path']
 DATA_INTERMEDIATE = os.path.join(BASE_PATH, 'intermediate')
 
-def generate_receivers(site_area, parameters, grid):
+def generate_receivers(site_area, parameters, grid, grid_size=None):
     """
 
     Generate receiver locations as points within the site area.
@@ -49,67 +54,36 @@ def generate_receivers(site_area, parameters, grid):
         Contains all necessary simulation parameters.
     grid : int
         Binary indicator to dictate receiver generation type.
+    grid_size : int, optional
+        Number of grid points along each axis when grid=1. Defaults to
+        a 50 x 50 grid over the site area bounds.
 
     Output
     ------
-    receivers : List of dicts
+    receivers : ReceiverSet
         Contains the quantity of desired receivers within the area boundary.
 
     """
-    receivers = []
-
     if grid == 1:
 
-        geom = shape(site_area[0]['geometry'])
-        geom_box = geom.bounds
-
-        minx = geom_box[0]
-        miny = geom_box[1]
-        maxx = geom_box[2]
-        maxy = geom_box[3]
-
-        id_number = 0
-
-        x_axis = np.linspace(
-            minx, maxx, num=(
-                int(math.sqrt(geom.area) / (math.sqrt(geom.area)/50))
-                )
-            )
-        y_axis = np.linspace(
-            miny, maxy, num=(
-                int(math.sqrt(geom.area) / (math.sqrt(geom.area)/50))
-                )
-            )
-
-        xv, yv = np.meshgrid(x_axis, y_axis, sparse=False, indexing='ij')
-        for i in range(len(x_axis)):
-            for j in range(len(y_axis)):
-                receiver = Point((xv[i,j], yv[i,j]))
-                indoor_outdoor_probability = np.random.rand(1,1)[0][0]
-                if geom.contains(receiver):
-                    receivers.append({
-                        'type': "Feature",
-                        'geometry': {
-                            "type": "Point",
-                            "coordinates": [xv[i,j], yv[i,j]],
-                        },
-                        'properties': {
-                            'ue_id': "id_{}".format(id_number),
-                            "misc_losses": parameters['rx_misc_losses'],
-                            "gain": parameters['rx_gain'],
-                            "losses": parameters['rx_losses'],
-                            "ue_height": float(parameters['rx_height']),
-                            "indoor": (True if float(indoor_outdoor_probability) < \
-                                float(0.5) else False),
-                        }
-                    })
-                    id_number += 1
-
-                else:
-                    pass
+        if grid_size is None:
+            geom = shape(site_area[0]['geometry'])
+            grid_size = int(math.sqrt(geom.area) / (math.sqrt(geom.area)/50))
+
+        candidates, inside = generate_grid_receiver_positions(
+            site_area[0], grid_size
+        )
+
+        indoor_outdoor_probability = np.random.rand(len(candidates))
+
+        coordinates = candidates[inside]
+        indoor = (indoor_outdoor_probability < 0.5)[inside]
 
     else:
 
+        coordinates = []
+        indoor = []
+
         centroid = shape(site_area[0]['geometry']).centroid
 
         coord = site_area[0]['geometry']['coordinates'][0][0]
@@ -117,42 +91,47 @@ def generate_receivers(site_area, parameters, grid):
         length = int(path.length)
         increment = int(length / 20)
 
-        indoor = parameters['indoor_users_percentage'] / 100
+        indoor_percentage = parameters['indoor_users_percentage'] / 100
 
-        id_number = 0
         for increment_value in range(1, 11):
             point = path.interpolate(increment * increment_value)
             indoor_outdoor_probability = np.random.rand(1,1)[0][0]
-            receivers.append({
-                'type': "Feature",
-                'geometry': mapping(point),
-                'properties': {
-                    'ue_id': "id_{}".format(id_number),
-                    "misc_losses": parameters['rx_misc_losses'],
-                    "gain": parameters['rx_gain'],
-                    "losses": parameters['rx_losses'],
-                    "ue_height": float(parameters['rx_height']),
-                    "indoor": (True if float(indoor_outdoor_probability) < \
-                        float(indoor) else False),
-                }
-            })
-            id_number += 1
+            coordinates.append((point.x, point.y))
+            indoor.append(
+                float(indoor_outdoor_probability) < float(indoor_percentage))
+
+    receivers = ReceiverSet(
+        coordinates,
+        ue_height=float(parameters['rx_height']),
+        gain=parameters['rx_gain'],
+        losses=parameters['rx_losses'],
+        misc_losses=parameters['rx_misc_losses'],
+        indoor=indoor,
+    )
 
     return receivers
 
 
-def obtain_percentile_values(results, transmission_type, parameters, confidence_intervals):
+def obtain_percentile_values(results, transmission_type, parameters,
+    confidence_intervals, exact=True, compression=100):
     """
 
     Get the threshold value for a metric based on a given percentiles.
 
     Parameters
     ----------
-    results : list of dicts
-        All data returned from the system simulation.
-
+    results : LinkBudgetResults or iterable of LinkBudgetResults
+        All data returned from the system simulation, either in one piece
+        or as a stream of chunks (e.g. Monte Carlo iterations).
     parameters : dict
         Contains all necessary simulation parameters.
+    confidence_intervals : list of ints
+        Confidence intervals to report.
+    exact : bool
+        If True, percentiles are exact. Otherwise each metric is summarised
+        with a t-digest sketch, keeping memory constant for large sweeps.
+    compression : int
+        Compression of the t-digest sketches (higher is more accurate).
 
     Output
     ------
@@ -160,83 +139,16 @@ def obtain_percentile_values(results, transmission_type, parameters, confidence_
         Contains the percentile value for each site metric.
 
     """
-    output = []
-
-    path_loss_values = []
-    received_power_values = []
-    interference_values = []
-    noise_values = []
-    sinr_values = []
-    spectral_efficiency_values = []
-    estimated_capacity_values = []
-    estimated_capacity_values_km2 = []
-
-    for result in results:
-
-        path_loss_values.append(result['path_loss'])
+    aggregator = PercentileAggregator(
+        confidence_intervals, exact=exact, compression=compression)
 
-        received_power_values.append(result['received_power'])
+    if isinstance(results, (LinkBudgetResults, dict)):
+        results = [results]
 
-        interference_values.append(result['interference'])
+    for chunk in results:
+        aggregator.update(chunk)
 
-        noise_values.append(result['noise'])
-
-        sinr = result['sinr']
-        if sinr == None:
-            sinr = 0
-        else:
-            sinr_values.append(sinr)
-
-        spectral_efficiency = result['spectral_efficiency']
-        if spectral_efficiency == None:
-            spectral_efficiency = 0
-        else:
-            spectral_efficiency_values.append(spectral_efficiency)
-
-        estimated_capacity = result['capacity_mbps']
-        if estimated_capacity == None:
-            estimated_capacity = 0
-        else:
-            estimated_capacity_values.append(estimated_capacity)
-
-        estimated_capacity_km2 = result['capacity_mbps_km2']
-        if estimated_capacity_km2 == None:
-            estimated_capacity_km2 = 0
-        else:
-            estimated_capacity_values_km2.append(estimated_capacity_km2)
-
-    for confidence_interval in confidence_intervals:
-
-        output.append({
-            'confidence_interval': confidence_interval,
-            'tranmission_type': transmission_type,
-            'path_loss': np.percentile(
-                path_loss_values, confidence_interval #<- low path loss is better
-            ),
-            'received_power': np.percentile(
-                received_power_values, 100 - confidence_interval
-            ),
-            'interference': np.percentile(
-                interference_values, confidence_interval #<- low interference is better
-            ),
-            'noise': np.percentile(
-                noise_values, confidence_interval #<- low interference is better
-            ),
-            'sinr': np.percentile(
-                sinr_values, 100 - confidence_interval
-            ),
-            'spectral_efficiency': np.percentile(
-                spectral_efficiency_values, 100 - confidence_interval
-            ),
-            'capacity_mbps': np.percentile(
-                estimated_capacity_values, 100 - confidence_interval
-            ),
-            'capacity_mbps_km2': np.percentile(
-                estimated_capacity_values_km2, 100 - confidence_interval
-            )
-        })
-
-    return output
+    return aggregator.percentile_values(transmission_type)
 
 
 def obtain_threshold_values_choice(results, parameters):
@@ -288,7 +200,7 @@ def convert_results_geojson(data):
 
     Parameters
     ----------
-    data : list of dicts
+    data : LinkBudgetResults
         Contains all results ready to be written.
 
     Outputs
@@ -299,29 +211,37 @@ def convert_results_geojson(data):
     """
     output = []
 
-    for datum in data:
+    columns = zip(
+        data['receiver_x'].tolist(),
+        data['receiver_y'].tolist(),
+        data['path_loss'].tolist(),
+        data['received_power'].tolist(),
+        data['interference'].tolist(),
+        data['noise'].tolist(),
+        data['sinr'].tolist(),
+        data['spectral_efficiency'].tolist(),
+        data['capacity_mbps'].tolist(),
+        data['capacity_mbps_km2'].tolist(),
+    )
+
+    for (receiver_x, receiver_y, path_loss, received_power, interference,
+        noise, sinr, spectral_efficiency, capacity_mbps,
+        capacity_mbps_km2) in columns:
         output.append({
             'type': 'Feature',
             'geometry': {
                 'type': 'Point',
-                'coordinates': [
-                    datum['receiver_x'], datum['receiver_y']]
+                'coordinates': [receiver_x, receiver_y]
                 },
             'properties': {
-                'path_loss': float(datum['path_loss']),
-                'received_power': float(datum['received_power']),
-                'interference': float(datum['interference']),
-                'noise': float(datum['noise']),
-                'sinr': float(datum['sinr']),
-                'spectral_efficiency': float(
-                    datum['spectral_efficiency']
-                ),
-                'capacity_mbps': float(
-                    datum['capacity_mbps']
-                ),
-                'capacity_mbps_km2': float(
-                    datum['capacity_mbps_km2']
-                ),
+                'path_loss': float(path_loss),
+                'received_power': float(received_power),
+                'interference': float(interference),
+                'noise': float(noise),
+                'sinr': float(sinr),
+                'spectral_efficiency': float(spectral_efficiency),
+                'capacity_mbps': float(capacity_mbps),
+                'capacity_mbps_km2': float(capacity_mbps_km2),
                 },
             }
         )
@@ -338,7 +258,7 @@ def write_full_results(data, environment, site_radius, frequency,
 
     Parameters
     ----------
-    data : list of dicts
+    data : LinkBudgetResults
         Contains all results ready to be written.
     environment : string
         Either urban, suburban or rural clutter type.
@@ -362,77 +282,21 @@ def write_full_results(data, environment, site_radius, frequency,
         Contains all necessary simulation parameters.
 
     """
-    sectors = parameters['sectorization']
-    inter_site_distance = site_radius * 2
-    site_area_km2 = (
-        math.sqrt(3) / 2 * inter_site_distance ** 2 / 1e6
-    )
-    sites_per_km2 = 1 / site_area_km2
-
     if not os.path.exists(directory):
         os.makedirs(directory)
 
     full_path = os.path.join(directory, filename)
 
-    results_file = open(full_path, 'w', newline='')
-    results_writer = csv.writer(results_file)
-    results_writer.writerow(
-        (
-            'environment',
-            'inter_site_distance_m',
-            'sites_per_km2',
-            'frequency_GHz',
-            'bandwidth_MHz',
-            'number_of_sectors',
-            'generation',
-            'ant_type',
-            'transmittion_type',
-            'receiver_x',
-            'receiver_y',
-            'r_distance',
-            'path_loss_dB',
-            'r_model',
-            'received_power_dB',
-            'interference_dB',
-            'i_model',
-            'noise_dB',
-            'sinr_dB',
-            'spectral_efficiency_bps_hz',
-            'capacity_mbps',
-            'capacity_mbps_km2'
-        )
+    write_full_results_csv(
+        full_results_table(data, environment, site_radius, frequency,
+            bandwidth, generation, ant_type, transmittion_type, parameters),
+        full_path
     )
 
-    for row in data:
-        results_writer.writerow((
-            environment,
-            inter_site_distance,
-            sites_per_km2,
-            frequency,
-            bandwidth,
-            sectors,
-            generation,
-            ant_type,
-            transmittion_type,
-            row['receiver_x'],
-            row['receiver_y'],
-            row['distance'],
-            row['path_loss'],
-            row['r_model'],
-            row['received_power'],
-            row['interference'],
-            row['i_model'],
-            row['noise'],
-            row['sinr'],
-            row['spectral_efficiency'],
-            row['capacity_mbps'],
-            row['capacity_mbps_km2'],
-            ))
-
 
 def write_frequency_lookup_table(results, environment, site_radius,
     frequency, bandwidth, generation, ant_type, tranmission_type,
-    directory, filename, parameters):
+    directory, filename, parameters, lut_writer=None):
     """
 
     Write the main, comprehensive lookup table for all environments,
@@ -462,75 +326,20 @@ def write_frequency_lookup_table(results, environment, site_radius,
         Name of the .csv file.
     parameters : dict
         Contains all necessary simulation parameters.
+    lut_writer : LutWriter, optional
+        Open writer kept for the whole sweep. Without one, the rows are
+        appended to directory/filename.
 
     """
-    inter_site_distance = site_radius * 2
-    site_area_km2 = math.sqrt(3) / 2 * inter_site_distance ** 2 / 1e6
-    sites_per_km2 = 1 / site_area_km2
-
-    sectors = parameters['sectorization']
-
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-
-    directory = os.path.join(directory, filename)
-
-    if not os.path.exists(directory):
-        lut_file = open(directory, 'w', newline='')
-        lut_writer = csv.writer(lut_file)
-        lut_writer.writerow(
-            (
-                'confidence_interval',
-                'environment',
-                'inter_site_distance_m',
-                'site_area_km2',
-                'sites_per_km2',
-                'frequency_GHz',
-                'bandwidth_MHz',
-                'number_of_sectors',
-                'generation',
-                'ant_type',
-                'transmission_type',
-                'path_loss_dB',
-                'received_power_dBm',
-                'interference_dBm',
-                'noise_dB',
-                'sinr_dB',
-                'spectral_efficiency_bps_hz',
-                'capacity_mbps',
-                'capacity_mbps_km2',
-            )
-        )
-    else:
-        lut_file = open(directory, 'a', newline='')
-        lut_writer = csv.writer(lut_file)
+    rows = lut_rows(results, environment, site_radius, frequency, bandwidth,
+        generation, ant_type, tranmission_type, parameters)
 
-    for result in results:
-        lut_writer.writerow(
-            (
-                result['confidence_interval'],
-                environment,
-                inter_site_distance,
-                site_area_km2,
-                sites_per_km2,
-                frequency,
-                bandwidth,
-                sectors,
-                generation,
-                ant_type,
-                tranmission_type,
-                result['path_loss'],
-                result['received_power'],
-                result['interference'],
-                result['noise'],
-                result['sinr'],
-                result['spectral_efficiency'],
-                result['capacity_mbps'],
-                result['capacity_mbps_km2'] * sectors,
-            )
-        )
+    if lut_writer is not None:
+        lut_writer.write(rows)
+        return
 
-    lut_file.close()
+    with LutWriter(os.path.join(directory, filename), append=True) as writer:
+        writer.write(rows)
 
 
 if __name__ == '__main__':
@@ -638,6 +447,15 @@ if __name__ == '__main__':
         95,
     ]
 
+    # number of grid receivers along each axis of the site area bounds
+    RECEIVER_GRID_SIZE = 50
+
+    # number of worker processes for the sweep
+    WORKERS = os.cpu_count()
+
+    # full results as one partitioned 'parquet' dataset, or one 'csv' per job
+    FULL_RESULTS_FORMAT = 'parquet'
+
     def generate_site_radii(min, max, increment):
         for n in range(min, max, increment):
             yield n
@@ -678,66 +496,45 @@ if __name__ == '__main__':
         'free-space'
     ]
 
-    for environment in environments:
-        for ant_type in ANT_TYPES:
-            site_radii_generator = SITE_RADII[ant_type]
-            for site_radius in site_radii_generator[environment]:
-
-                # if not site_radius == 4400:
-                #     continue
-
-                if environment == 'urban' and site_radius > 5000:
-                    continue
-                if environment == 'suburban' and site_radius > 15000:
-                    continue
-
-                print('--working on {}: {}'.format(environment, site_radius))
-
-                transmitter, interfering_transmitters, site_area, int_site_areas = \
-                    produce_sites_and_site_areas(
-                        unprojected_point['geometry']['coordinates'],
-                        site_radius,
-                        unprojected_crs,
-                        projected_crs
-                        )
-
-                receivers = generate_receivers(site_area, PARAMETERS, 1)
-
-                for frequency, bandwidth, generation, transmission_type in SPECTRUM_PORTFOLIO:
-
-                    print('{}, {}, {}, {}'.format(frequency, bandwidth, generation, transmission_type))
-
-                    MANAGER = SimulationManager(
-                        transmitter, interfering_transmitters, ant_type,
-                        receivers, site_area, PARAMETERS
-                        )
-
-                    results = MANAGER.estimate_link_budget(
-                        frequency,
-                        bandwidth,
-                        generation,
-                        ant_type,
-                        transmission_type,
-                        environment,
-                        MODULATION_AND_CODING_LUT,
-                        PARAMETERS
-                        )
-
-                    folder = os.path.join(DATA_INTERMEDIATE, 'luts', 'full_tables')
-                    filename = 'full_capacity_lut_{}_{}_{}_{}_{}_{}.csv'.format(
-                        environment, site_radius, generation, frequency, ant_type, transmission_type)
-
-                    write_full_results(results, environment, site_radius,
-                        frequency, bandwidth, generation, ant_type, transmission_type,
-                        folder, filename, PARAMETERS)
-
-                    percentile_site_results = obtain_percentile_values(
-                        results, transmission_type, PARAMETERS, CONFIDENCE_INTERVALS
-                    )
-
-                    results_directory = os.path.join(DATA_INTERMEDIATE, 'luts')
-                    write_frequency_lookup_table(percentile_site_results, environment,
-                        site_radius, frequency, bandwidth, generation,
-                        ant_type, transmission_type, results_directory,
-                        'capacity_lut_by_frequency.csv', PARAMETERS
-                    )
+    template = get_site_layout_template(
+        unprojected_point['geometry']['coordinates'],
+        unprojected_crs,
+        projected_crs,
+        grid_size=RECEIVER_GRID_SIZE,
+        directory=os.path.join(DATA_INTERMEDIATE, 'templates')
+        )
+
+    jobs = sweep_jobs(
+        environments,
+        ANT_TYPES,
+        SITE_RADII,
+        SPECTRUM_PORTFOLIO,
+        max_site_radius={'urban': 5000, 'suburban': 15000}
+        )
+
+    full_results_directory = os.path.join(DATA_INTERMEDIATE, 'luts', 'full_tables')
+
+    if FULL_RESULTS_FORMAT == 'parquet':
+        full_results_writer = ParquetFullResultsWriter(full_results_directory,
+            PARAMETERS)
+    else:
+        full_results_writer = CsvFullResultsWriter(full_results_directory,
+            PARAMETERS)
+
+    runner = SweepRunner(
+        template,
+        PARAMETERS,
+        MODULATION_AND_CODING_LUT,
+        CONFIDENCE_INTERVALS,
+        workers=WORKERS,
+        full_results_writer=full_results_writer,
+        )
+
+    # completed jobs are recorded here, so rerunning after an interruption
+    # picks up where the sweep stopped
+    manifest = SweepManifest(os.path.join(DATA_INTERMEDIATE, 'luts',
+        'capacity_lut_by_frequency_manifest.jsonl'))
+
+    with full_results_writer:
+        runner.run(jobs, os.path.join(DATA_INTERMEDIATE, 'luts'),
+            'capacity_lut_by_frequency.csv', manifest)
@@ -55,7 +55,7 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            # eg: 'snkit = snkit.cli:main',
+            'dice-sim = dice.cli:main',
         ]
     },
 )
@@ -0,0 +1,319 @@
+"""
+Command line interface for capacity lookup table sweeps.
+
+    dice-sim run sweep.json [--shard 2/4] [--workers 8]
+    dice-sim merge capacity_lut_by_frequency.csv shard-*.csv
+
+A sweep is described by a JSON config file (see scripts/sim_config.json)
+holding the simulation parameters, spectrum portfolio, site radii and
+environments. Sharding splits the site radii deterministically, so each
+machine given the same config and a different --shard runs a disjoint
+part of the sweep, and the shard lookup tables can then be merged into
+the same table an unsharded run would produce.
+
+"""
+import os
+import sys
+import json
+import argparse
+
+from dice.generate_hex import get_site_layout_template
+from dice.sweep import (SweepRunner, SweepManifest, sweep_jobs, shard_jobs,
+    merge_lut_files)
+from dice.writers import CsvFullResultsWriter, ParquetFullResultsWriter
+
+LUT_FILENAME = 'capacity_lut_by_frequency.csv'
+
+CONFIG_DEFAULTS = {
+    'ant_types': ['macro'],
+    'confidence_intervals': [5, 50, 95],
+    'max_site_radius': {},
+    'origin': [0, 0],
+    'unprojected_crs': 'epsg:4326',
+    'projected_crs': 'epsg:3857',
+    'rings': 1,
+    'receiver_grid_size': 50,
+    'workers': None,
+    'full_results_format': 'parquet',
+    'output_directory': 'luts',
+    'refinement': None,
+}
+
+CONFIG_REQUIRED = [
+    'parameters',
+    'spectrum_portfolio',
+    'modulation_and_coding_lut',
+    'environments',
+    'site_radii',
+]
+
+
+def load_config(path):
+    """
+
+    Load a sweep config file, filling in defaults.
+
+    Site radii are either a list of radii, or a dict of
+    {"start", "stop", "step"} following range(). Either form can also be
+    given by ant_type then environment. Relative output directories are
+    resolved against the folder of the config file.
+
+    An optional "refinement" dict of {"coarse_step", "tolerances",
+    "max_rounds"} switches to an adaptive sweep over a range of site
+    radii, refined down to the range step (see
+    `SweepRunner.run_adaptive`).
+
+    Parameters
+    ----------
+    path : string
+        Path of the .json config file.
+
+    Returns
+    -------
+    config : dict
+        Sweep config.
+
+    """
+    with open(path) as config_file:
+        config = json.load(config_file)
+
+    missing = [key for key in CONFIG_REQUIRED if key not in config]
+    if missing:
+        raise ValueError('Missing from {}: {}'.format(path, ', '.join(missing)))
+
+    for key, value in CONFIG_DEFAULTS.items():
+        config.setdefault(key, value)
+
+    config['spectrum_portfolio'] = [
+        tuple(band) for band in config['spectrum_portfolio']]
+
+    config['modulation_and_coding_lut'] = {
+        generation: [tuple(row) for row in rows]
+        for generation, rows in config['modulation_and_coding_lut'].items()
+    }
+
+    site_radii = config['site_radii']
+
+    if config['refinement'] is not None:
+        if not (isinstance(site_radii, dict) and _is_range(site_radii)):
+            raise ValueError('Refinement needs site_radii as a range of '
+                '{"start", "stop", "step"}')
+        refinement = dict(config['refinement'])
+        refinement['start'] = site_radii['start']
+        refinement['stop'] = site_radii['stop']
+        refinement['min_step'] = site_radii.get('step', 1)
+        config['refinement'] = refinement
+
+    if isinstance(site_radii, dict) and not _is_range(site_radii):
+        config['site_radii'] = {
+            ant_type: {
+                environment: _site_radii(radii)
+                for environment, radii in by_environment.items()
+            }
+            for ant_type, by_environment in site_radii.items()
+        }
+    else:
+        config['site_radii'] = _site_radii(site_radii)
+
+    config['output_directory'] = os.path.join(
+        os.path.dirname(os.path.abspath(path)), config['output_directory'])
+
+    return config
+
+
+def _is_range(site_radii):
+    return set(site_radii) <= {'start', 'stop', 'step'}
+
+
+def _site_radii(site_radii):
+    if isinstance(site_radii, dict):
+        return list(range(
+            site_radii['start'], site_radii['stop'], site_radii.get('step', 1)))
+
+    return list(site_radii)
+
+
+def parse_shard(value):
+    """
+
+    Parse a shard given as 'i/n', where 1 <= i <= n.
+
+    """
+    try:
+        shard, shards = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Shard must be given as i/n, e.g. 1/4: {}'.format(value))
+
+    if not 1 <= shard <= shards:
+        raise argparse.ArgumentTypeError(
+            'Shard i/n must have 1 <= i <= n: {}'.format(value))
+
+    return shard, shards
+
+
+def shard_filename(filename, shard, shards):
+    """
+
+    Name of the output of one shard, e.g.
+    capacity_lut_by_frequency.shard-2-of-4.csv.
+
+    """
+    stem, extension = os.path.splitext(filename)
+
+    return '{}.shard-{}-of-{}{}'.format(stem, shard, shards, extension)
+
+
+def run(config, shard=None, workers=None, timings=False):
+    """
+
+    Run a sweep, or one shard of it.
+
+    Parameters
+    ----------
+    config : dict
+        Sweep config, as returned by `load_config`.
+    shard : tuple, optional
+        Shard to run as (i, n).
+    workers : int, optional
+        Number of worker processes, overriding the config.
+    timings : bool
+        If True, record the time spent in each stage of each task in
+        {lookup table}_timings.jsonl.
+
+    Returns
+    -------
+    path : string
+        Path of the capacity lookup table.
+
+    """
+    directory = config['output_directory']
+
+    jobs = sweep_jobs(
+        config['environments'],
+        config['ant_types'],
+        config['site_radii'],
+        config['spectrum_portfolio'],
+        max_site_radius=config['max_site_radius'],
+    )
+
+    refinement = config['refinement']
+
+    filename = LUT_FILENAME
+    if shard is not None:
+        if refinement is not None:
+            raise ValueError('Adaptive refinement cannot be sharded')
+        jobs = shard_jobs(jobs, *shard)
+        filename = shard_filename(filename, *shard)
+
+    template = get_site_layout_template(
+        tuple(config['origin']),
+        config['unprojected_crs'],
+        config['projected_crs'],
+        rings=config['rings'],
+        grid_size=config['receiver_grid_size'],
+        directory=os.path.join(directory, 'templates'),
+    )
+
+    full_results_directory = os.path.join(directory, 'full_tables')
+
+    if config['full_results_format'] == 'parquet':
+        full_results_writer = ParquetFullResultsWriter(full_results_directory,
+            config['parameters'])
+    elif config['full_results_format'] == 'csv':
+        full_results_writer = CsvFullResultsWriter(full_results_directory,
+            config['parameters'])
+    elif config['full_results_format'] is None:
+        full_results_writer = None
+    else:
+        raise ValueError('Did not recognise full_results_format: {}'.format(
+            config['full_results_format']))
+
+    stem, extension = os.path.splitext(filename)
+
+    runner = SweepRunner(
+        template,
+        config['parameters'],
+        config['modulation_and_coding_lut'],
+        config['confidence_intervals'],
+        workers=workers or config['workers'] or os.cpu_count(),
+        full_results_writer=full_results_writer,
+        timings_path=os.path.join(directory,
+            '{}_timings.jsonl'.format(stem)) if timings else None,
+    )
+
+    manifest = SweepManifest(os.path.join(
+        directory, '{}_manifest.jsonl'.format(stem)))
+
+    if full_results_writer is None:
+        return _run(runner, config, jobs, directory, filename, manifest)
+
+    with full_results_writer:
+        return _run(runner, config, jobs, directory, filename, manifest)
+
+
+def _run(runner, config, jobs, directory, filename, manifest):
+    refinement = config['refinement']
+
+    if refinement is None:
+        return runner.run(jobs, directory, filename, manifest)
+
+    return runner.run_adaptive(
+        config['environments'],
+        config['ant_types'],
+        config['spectrum_portfolio'],
+        refinement['start'],
+        refinement['stop'],
+        directory,
+        filename,
+        manifest,
+        coarse_step=refinement.get('coarse_step', 1000),
+        min_step=refinement['min_step'],
+        tolerances=refinement.get('tolerances'),
+        max_site_radius=config['max_site_radius'],
+        max_rounds=refinement.get('max_rounds'),
+    )
+
+
+def main(argv=None):
+    """
+
+    Entry point of the dice-sim command.
+
+    """
+    parser = argparse.ArgumentParser(prog='dice-sim',
+        description='Simulate capacity lookup tables.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='run a sweep')
+    run_parser.add_argument('config', help='path of the .json sweep config')
+    run_parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+        help='only run shard I of N (1 <= I <= N)')
+    run_parser.add_argument('--workers', type=int,
+        help='number of worker processes')
+    run_parser.add_argument('--timings', action='store_true',
+        help='record the time spent in each stage of each task')
+
+    merge_parser = subparsers.add_parser('merge',
+        help='merge shard lookup tables into one')
+    merge_parser.add_argument('output', help='path of the merged .csv')
+    merge_parser.add_argument('shards', nargs='+',
+        help='paths of the shard .csv lookup tables')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        path = run(load_config(args.config), args.shard, args.workers,
+            args.timings)
+        print('Wrote {}'.format(path))
+
+    elif args.command == 'merge':
+        rows = merge_lut_files(args.shards, args.output)
+        print('Merged {} rows into {}'.format(rows, args.output))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,13 +13,72 @@ See the git repo for futher details: https://github.com/urschrei/hexcover
 import os
 import configparser
 import math
+import numpy as np
 from shapely.geometry import Point, mapping, shape, Polygon
-from rtree import index
-import geopandas as gpd
+import pyproj
 
 from collections import OrderedDict
 
 
+_TRANSFORMERS = {}
+
+
+def get_transformer(original_crs, new_crs):
+    """
+
+    Return a transformer between two Coordinate Reference Systems,
+    creating it at most once per process for each pair.
+
+    Parameters
+    ----------
+    original_crs : string
+        Original Coordinate Reference System.
+    new_crs : string
+        New Coordinate Reference System.
+
+    Returns
+    -------
+    transformer : pyproj.Transformer
+        Transformer taking (x, y) or (lon, lat) coordinates.
+
+    """
+    key = (original_crs, new_crs)
+
+    if key not in _TRANSFORMERS:
+        _TRANSFORMERS[key] = pyproj.Transformer.from_crs(
+            original_crs, new_crs, always_xy=True)
+
+    return _TRANSFORMERS[key]
+
+
+def project_points(points, original_crs, new_crs):
+    """
+
+    Project an array of points in one call.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        (..., 2) x and y (or lon and lat) coordinates.
+    original_crs : string
+        Original Coordinate Reference System.
+    new_crs : string
+        New Coordinate Reference System.
+
+    Returns
+    -------
+    projected : numpy.ndarray
+        (..., 2) coordinates in the new Coordinate Reference System.
+
+    """
+    points = np.asarray(points, dtype=float)
+
+    x, y = get_transformer(original_crs, new_crs).transform(
+        points[..., 0], points[..., 1])
+
+    return np.stack((x, y), axis=-1)
+
+
 def convert_point_to_projected_crs(point, original_crs, new_crs):
     """
 
@@ -40,13 +99,7 @@ def convert_point_to_projected_crs(point, original_crs, new_crs):
         Geojson point in desired Coordinate Reference System.
 
     """
-    geom = Point(point)
-
-    geo = gpd.GeoDataFrame(geometry=gpd.GeoSeries(geom), crs='epsg:4326')
-
-    geo = geo.to_crs("epsg:3857")
-
-    geom = geo['geometry'].values[0]
+    geom = Point(project_points(point, original_crs, new_crs))
 
     output = {
         'type': 'Feature',
@@ -61,9 +114,10 @@ def calculate_polygons(startx, starty, endx, endy, radius):
     """
 
     Calculate a grid of hexagon coordinates of the given radius
-    given lower-left and upper-right coordinates. Returns a
-    list of lists containing 6 tuples of x, y point coordinates.
-    These can be used to construct valid regular hexagonal polygons
+    given lower-left and upper-right coordinates. Returns the
+    vertices of each regular hexagon (the first vertex repeated to
+    close the ring) and its centroid, both as NumPy arrays. Shapely
+    polygons can be built on demand with `hexagon_polygons`.
     Projected coordinates are advised.
 
     Parameters
@@ -81,9 +135,11 @@ def calculate_polygons(startx, starty, endx, endy, radius):
 
     Returns
     -------
-    polygons : list of lists
-        A list containing multiple polygons. Each individual polygon
-        is a list of tuple coordinates.
+    vertices : numpy.ndarray
+        (n, 7, 2) hexagon vertex coordinates, ordered row by row from
+        the lower-left corner.
+    centroids : numpy.ndarray
+        (n, 2) hexagon centroid coordinates.
 
     """
     # calculate side length given radius
@@ -107,72 +163,102 @@ def calculate_polygons(startx, starty, endx, endy, radius):
     endx = endx + w
     endy = endy + h
 
-    origx = startx
-    origy = starty
-
     # offsets for moving along and up rows
     xoffset = b
     yoffset = 3 * p
 
-    polygons = []
-    row = 1
-    counter = 0
+    # row and column origins, accumulated in the same order as stepping
+    # along the grid so the coordinates are reproducible
+    y_axis = _grid_axis(starty, endy, yoffset)
+    columns = [
+        _grid_axis(startx, endx, w),              # odd rows
+        _grid_axis(startx + xoffset, endx, w),    # even rows, offset
+    ]
+
+    odd = np.arange(len(y_axis)) % 2
+    counts = np.where(odd, len(columns[1]), len(columns[0]))
+
+    row = np.repeat(np.arange(len(y_axis)), counts)
+    row_start = np.cumsum(counts) - counts
+    column = np.arange(counts.sum()) - np.repeat(row_start, counts)
+
+    x = np.where(
+        odd[row],
+        columns[1][np.minimum(column, len(columns[1]) - 1)],
+        columns[0][np.minimum(column, len(columns[0]) - 1)]
+    )
+    y = y_axis[row]
+
+    vertex_offsets = np.array([
+        (0, p),
+        (0, 3 * p),
+        (b, h),
+        (w, 3 * p),
+        (w, p),
+        (b, 0),
+        (0, p),
+    ])
+
+    vertices = np.empty((len(x), 7, 2))
+    vertices[:, :, 0] = x[:, None] + vertex_offsets[:, 0]
+    vertices[:, :, 1] = y[:, None] + vertex_offsets[:, 1]
 
-    while starty < endy:
+    centroids = np.column_stack((x + b, y + sl))
 
-        if row % 2 == 0:
-            startx = origx + xoffset
+    return vertices, centroids
 
-        else:
-            startx = origx
 
-        while startx < endx:
-            p1x = startx
-            p1y = starty + p
-            p2x = startx
-            p2y = starty + (3 * p)
-            p3x = startx + b
-            p3y = starty + h
-            p4x = startx + w
-            p4y = starty + (3 * p)
-            p5x = startx + w
-            p5y = starty + p
-            p6x = startx + b
-            p6y = starty
-            poly = [
-                (p1x, p1y),
-                (p2x, p2y),
-                (p3x, p3y),
-                (p4x, p4y),
-                (p5x, p5y),
-                (p6x, p6y),
-                (p1x, p1y)]
+def _grid_axis(start, end, step):
+    """
+    Positions start, start + step, ... strictly below end.
+    """
+    count = max(int(math.ceil((end - start) / step)) + 2, 1)
+    axis = np.cumsum(np.concatenate(([start], np.full(count - 1, step))))
+
+    return axis[axis < end]
+
+
+def hexagon_polygons(vertices):
+    """
+
+    Build shapely polygons from an array of hexagon vertices.
+
+    Parameters
+    ----------
+    vertices : numpy.ndarray
+        (n, 7, 2) hexagon vertex coordinates, or (7, 2) for one hexagon.
 
-            polygons.append(poly)
+    Returns
+    -------
+    polygons : list of shapely Polygons, or a single Polygon
+        One polygon per hexagon.
 
-            counter += 1
-            startx += w
+    """
+    vertices = np.asarray(vertices)
 
-        starty += yoffset
-        row += 1
+    if vertices.ndim == 2:
+        return Polygon(vertices)
 
-    return polygons
+    return [Polygon(hexagon) for hexagon in vertices]
 
 
-def find_closest_site_areas(hexagons, geom_shape):
+def find_closest_site_areas(hex_grid, geom_shape, rings=1):
     """
 
-    Get the transmitter and interfering site areas, by finding the closest
-    hex shapes. The first closest hex shape to the transmitter will be the
-    transmitter's site area. The next closest hex areas will be the
-    intefering site areas.
+    Get the transmitter and interfering site areas from the hex grid. The
+    hexagon containing the transmitter (i.e. with the closest centroid) is
+    the transmitter's site area, and the hexagons in the surrounding rings
+    are the intefering site areas.
 
     Parameters
     ----------
-    hexagons : list of dicts
-        Each haxagon is a geojson dict.
+    hex_grid : HexGrid
+        Hex grid addressing the site areas.
     geom_shape : Shapely geometry object
         Geometry object for the transmitter.
+    rings : int
+        Number of hex rings of interfering site areas (1 ring gives 6
+        sites, 2 rings give 18 and 3 rings give 36).
 
     Returns
     -------
@@ -182,39 +268,313 @@ def find_closest_site_areas(hexagons, geom_shape):
         Contains the geojson interfering site areas.
 
     """
-    idx = index.Index()
+    x, y = geom_shape.centroid.coords[0]
 
-    for site in hexagons:
-        coords = site['centroid']
-        idx.insert(0, coords.bounds, site)
+    q, r = hex_grid.point_to_cell(x, y)
 
-    transmitter = mapping(geom_shape.centroid)
+    cells = hex_k_ring(int(q), int(r), rings)
 
-    site_area =  list(
-        idx.nearest(
-            (transmitter['coordinates'][0],
-            transmitter['coordinates'][1],
-            transmitter['coordinates'][0],
-            transmitter['coordinates'][1]),
-            1, objects='raw')
-            )[0]
+    centroids = hex_grid.cell_to_point(cells[:, 0], cells[:, 1])
+    vertices = hex_grid.cell_vertices(cells[:, 0], cells[:, 1])
+    site_ids = hex_grid.cell_ids(cells[:, 0], cells[:, 1]).tolist()
 
-    closest_site_area_centroid = Polygon(
-        site_area['geometry']['coordinates'][0]
-        ).centroid
+    hexagons = [
+        _hexagon_feature(polygon, centroid, site_id)
+        for polygon, centroid, site_id in zip(vertices, centroids, site_ids)
+    ]
 
-    all_closest_sites =  list(
-        idx.nearest(
-            closest_site_area_centroid.bounds,
-            7, objects='raw')
-            )
+    site_area = hexagons[:1]
+    interfering_site_areas = hexagons[1:]
+
+    return site_area, interfering_site_areas
 
-    interfering_site_areas = all_closest_sites[1:7]
 
-    site_area = []
-    site_area.append(all_closest_sites[0])
+# axial (q, r) offsets of the six neighbours of a hexagon
+HEX_DIRECTIONS = np.array([(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)])
 
-    return site_area, interfering_site_areas
+
+class HexGrid(object):
+    """
+
+    Regular grid of pointy-top hexagons addressed with axial (q, r)
+    coordinates, where r is the row and q runs along the row.
+
+    Point-to-cell and cell-to-point conversions are closed form, so
+    finding the site area for a location, or the site areas in the rings
+    around it, does not require building or searching any geometries.
+
+    Parameters
+    ----------
+    origin : tuple
+        x and y coordinates of the centroid of cell (0, 0).
+    radius : int
+        Given radius of site areas (centroid to edge midpoint).
+    row_lengths : tuple, optional
+        Number of hexagons in even and odd rows, used to number cells
+        row by row in the same order as `calculate_polygons`.
+
+    """
+    def __init__(self, origin, radius, row_lengths=None):
+
+        self.origin = np.asarray(origin, dtype=float)
+        self.radius = radius
+        self.row_lengths = row_lengths
+
+        self.side_length = (2 * radius) * math.tan(math.pi / 6)
+        self.half_width = self.side_length * math.cos(math.radians(30))
+
+
+    @classmethod
+    def from_bounds(cls, startx, starty, endx, endy, radius):
+        """
+
+        Hex grid aligned with, and numbered like, the hexagons returned
+        by `calculate_polygons` for the same arguments.
+
+        """
+        sl = (2 * radius) * math.tan(math.pi / 6)
+        b = sl * math.cos(math.radians(30))
+        w = b * 2
+        h = 2 * sl
+
+        startx = startx - w
+        starty = starty - h
+        endx = endx + w
+
+        row_lengths = (
+            len(_grid_axis(startx, endx, w)),
+            len(_grid_axis(startx + b, endx, w)),
+        )
+
+        return cls((startx + b, starty + sl), radius, row_lengths)
+
+
+    def point_to_cell(self, x, y):
+        """
+
+        Get the cell containing each point.
+
+        Parameters
+        ----------
+        x : float or numpy.ndarray
+            x coordinates.
+        y : float or numpy.ndarray
+            y coordinates.
+
+        Returns
+        -------
+        q : numpy.ndarray
+            Axial q coordinates.
+        r : numpy.ndarray
+            Axial r coordinates (rows).
+
+        """
+        x = (np.asarray(x, dtype=float) - self.origin[0]) / self.side_length
+        y = (np.asarray(y, dtype=float) - self.origin[1]) / self.side_length
+
+        q = math.sqrt(3) / 3 * x - y / 3
+        r = 2 / 3 * y
+
+        return hex_round(q, r)
+
+
+    def cell_to_point(self, q, r):
+        """
+
+        Get the centroid of each cell.
+
+        Returns
+        -------
+        centroids : numpy.ndarray
+            (n, 2) centroid coordinates.
+
+        """
+        q = np.atleast_1d(q)
+        r = np.atleast_1d(r)
+
+        return np.column_stack((
+            self.origin[0] + self.half_width * (2 * q + r),
+            self.origin[1] + 1.5 * self.side_length * r
+        ))
+
+
+    def cell_vertices(self, q, r):
+        """
+
+        Get the vertices of each cell, ordered as in `calculate_polygons`.
+
+        Returns
+        -------
+        vertices : numpy.ndarray
+            (n, 7, 2) hexagon vertex coordinates.
+
+        """
+        b = self.half_width
+        p = self.side_length * 0.5
+
+        vertex_offsets = np.array([
+            (-b, -p),
+            (-b, p),
+            (0, self.side_length),
+            (b, p),
+            (b, -p),
+            (0, -self.side_length),
+            (-b, -p),
+        ])
+
+        return self.cell_to_point(q, r)[:, None, :] + vertex_offsets
+
+
+    def cell_ids(self, q, r):
+        """
+
+        Number each cell row by row from the lower-left corner, as the
+        hexagons returned by `calculate_polygons` are ordered.
+
+        Returns
+        -------
+        ids : numpy.ndarray
+            (n,) cell ids.
+
+        """
+        if self.row_lengths is None:
+            raise ValueError('Cell ids need the grid row lengths')
+
+        q = np.atleast_1d(q)
+        r = np.atleast_1d(r)
+
+        even, odd = self.row_lengths
+        column = q + (r - (r & 1)) // 2
+
+        return (r // 2) * (even + odd) + (r & 1) * even + column
+
+
+def hex_round(q, r):
+    """
+
+    Round fractional axial coordinates to the containing hexagon.
+
+    Parameters
+    ----------
+    q : float or numpy.ndarray
+        Fractional axial q coordinates.
+    r : float or numpy.ndarray
+        Fractional axial r coordinates.
+
+    Returns
+    -------
+    q : numpy.ndarray
+        Axial q coordinates.
+    r : numpy.ndarray
+        Axial r coordinates.
+
+    """
+    s = -q - r
+
+    rq = np.round(q)
+    rr = np.round(r)
+    rs = np.round(s)
+
+    dq = np.abs(rq - q)
+    dr = np.abs(rr - r)
+    ds = np.abs(rs - s)
+
+    # the cube coordinates must sum to zero, so recompute the one with
+    # the largest rounding error from the other two
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+
+    return rq.astype(int), rr.astype(int)
+
+
+def hex_distance(q1, r1, q2, r2):
+    """
+
+    Number of steps between two hexagons on the grid.
+
+    """
+    dq = np.asarray(q1) - q2
+    dr = np.asarray(r1) - r2
+
+    return (np.abs(dq) + np.abs(dr) + np.abs(dq + dr)) // 2
+
+
+def hex_ring(q, r, k):
+    """
+
+    Get the hexagons exactly k steps away from a hexagon.
+
+    Parameters
+    ----------
+    q : int
+        Axial q coordinate of the center hexagon.
+    r : int
+        Axial r coordinate of the center hexagon.
+    k : int
+        Ring number.
+
+    Returns
+    -------
+    cells : numpy.ndarray
+        (6k, 2) axial coordinates, walking around the ring (or the center
+        itself when k is 0).
+
+    """
+    if k == 0:
+        return np.array([(q, r)])
+
+    steps = np.repeat(HEX_DIRECTIONS, k, axis=0)
+    start = np.array((q, r)) + HEX_DIRECTIONS[4] * k
+
+    offsets = np.cumsum(steps, axis=0) - steps
+
+    return start + offsets
+
+
+def hex_k_ring(q, r, k):
+    """
+
+    Get a hexagon and all hexagons within k steps, ring by ring.
+
+    Parameters
+    ----------
+    q : int
+        Axial q coordinate of the center hexagon.
+    r : int
+        Axial r coordinate of the center hexagon.
+    k : int
+        Number of rings.
+
+    Returns
+    -------
+    cells : numpy.ndarray
+        (1 + 3k(k + 1), 2) axial coordinates, starting with the center.
+
+    """
+    return np.concatenate([hex_ring(q, r, ring) for ring in range(k + 1)])
+
+
+def hex_ring_size(rings):
+    """
+
+    Number of hexagons in the given number of rings around a center
+    hexagon (6, 18, 36, ...), excluding the center itself.
+
+    Parameters
+    ----------
+    rings : int
+        Number of hex rings.
+
+    Returns
+    -------
+    size : int
+        Number of hexagons in the rings.
+
+    """
+    return 3 * rings * (rings + 1)
 
 
 def find_site_locations(site_area, interfering_site_areas):
@@ -263,7 +623,7 @@ def find_site_locations(site_area, interfering_site_areas):
     return transmitter, interfering_transmitters
 
 
-def generate_site_areas(point, site_radius):
+def generate_site_areas(point, site_radius, rings=1):
     """
 
     Generate a site area, as well as the interfering site areas, for
@@ -275,6 +635,8 @@ def generate_site_areas(point, site_radius):
         Geojson point in desired Coordinate Reference System.
     site_radius : int
         Distance between transmitter and site edge in meters.
+    rings : int
+        Number of hex rings of interfering site areas.
 
     Returns
     -------
@@ -286,39 +648,22 @@ def generate_site_areas(point, site_radius):
     """
     geom_shape = shape(point['geometry'])
 
-    buffered = Polygon(geom_shape.buffer(site_radius*2).exterior)
+    buffered = Polygon(geom_shape.buffer(site_radius*2*rings).exterior)
 
-    polygon = calculate_polygons(
+    hex_grid = HexGrid.from_bounds(
         buffered.bounds[0], buffered.bounds[1],
         buffered.bounds[2], buffered.bounds[3],
         site_radius)
 
-    hexagons = []
-    id_num = 0
-    for poly in polygon:
-        hexagons.append({
-            'type': 'Feature',
-            'geometry': {
-                'type': 'Polygon',
-                'coordinates': [poly],
-            },
-            'centroid': (Polygon(poly).centroid),
-            'properties': {
-                'site_id': id_num
-                }
-            })
-
-        id_num += 1
-
     site_area, interfering_site_areas = find_closest_site_areas(
-        hexagons, geom_shape
+        hex_grid, geom_shape, rings
     )
 
     return site_area, interfering_site_areas
 
 
 def produce_sites_and_site_areas(unprojected_point, site_radius, unprojected_crs,
-    projected_crs):
+    projected_crs, rings=1):
     """
 
     Meta function to produce a set of hex shapes with a specific site_radius.
@@ -329,6 +674,9 @@ def produce_sites_and_site_areas(unprojected_point, site_radius, unprojected_crs
         x and y coordinates for an unprojected point.
     site_radius : int
         Distance between transmitter and site edge in meters.
+    rings : int
+        Number of hex rings of interfering sites (1 ring gives 6 sites,
+        2 rings give 18 and 3 rings give 36).
 
     Returns
     -------
@@ -347,10 +695,406 @@ def produce_sites_and_site_areas(unprojected_point, site_radius, unprojected_crs
         projected_crs
     )
 
-    site_area, interfering_site_areas = generate_site_areas(point, site_radius)
+    site_area, interfering_site_areas = generate_site_areas(point, site_radius,
+        rings)
 
     transmitter, interfering_transmitters = find_site_locations(site_area,
         interfering_site_areas
     )
 
     return transmitter, interfering_transmitters, site_area, interfering_site_areas
+
+
+class SiteLayoutTemplate(object):
+    """
+
+    Hex site layout computed once for a unit site radius.
+
+    The layout for any site radius is the same unit-hexagon pattern
+    scaled by the radius, so each radius is a cheap scaling of the cached
+    arrays. All coordinates are held relative to the projected origin.
+
+    Parameters
+    ----------
+    origin : tuple
+        Projected x and y coordinates of the origin point.
+    transmitter : numpy.ndarray
+        (2,) unit coordinates of the serving transmitter.
+    site_area : numpy.ndarray
+        (7, 2) unit vertices of the serving site area.
+    site_area_id : int
+        Id of the serving site area.
+    interferers : numpy.ndarray
+        (M, 2) unit coordinates of the interfering transmitters.
+    interfering_site_areas : numpy.ndarray
+        (M, 7, 2) unit vertices of the interfering site areas.
+    interfering_site_ids : numpy.ndarray
+        (M,) ids of the interfering site areas.
+    receivers : numpy.ndarray
+        (K, 2) unit coordinates of the grid receivers inside the site area.
+    receiver_mask : numpy.ndarray
+        (G,) boolean flags marking which grid candidates are receivers.
+
+    """
+    def __init__(self, origin, transmitter, site_area, site_area_id,
+        interferers, interfering_site_areas, interfering_site_ids,
+        receivers, receiver_mask):
+
+        self.origin = np.asarray(origin, dtype=float)
+        self.transmitter = np.asarray(transmitter, dtype=float)
+        self.site_area = np.asarray(site_area, dtype=float)
+        self.site_area_id = int(site_area_id)
+        self.interferers = np.asarray(interferers, dtype=float)
+        self.interfering_site_areas = np.asarray(
+            interfering_site_areas, dtype=float)
+        self.interfering_site_ids = np.asarray(interfering_site_ids)
+        self.receivers = np.asarray(receivers, dtype=float)
+        self.receiver_mask = np.asarray(receiver_mask, dtype=bool)
+
+
+    @classmethod
+    def build(cls, origin, rings=1, grid_size=50):
+        """
+
+        Build the unit template around a projected origin.
+
+        Parameters
+        ----------
+        origin : tuple
+            Projected x and y coordinates of the origin point.
+        rings : int
+            Number of hex rings of interfering sites.
+        grid_size : int
+            Number of grid receiver candidates along each axis.
+
+        Returns
+        -------
+        template : SiteLayoutTemplate
+            Unit site layout.
+
+        """
+        point = {
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Point',
+                'coordinates': (0, 0),
+                },
+            }
+
+        site_area, interfering_site_areas = generate_site_areas(point, 1, rings)
+
+        transmitter, interfering_transmitters = find_site_locations(site_area,
+            interfering_site_areas
+        )
+
+        candidates, receiver_mask = generate_grid_receiver_positions(
+            site_area[0], grid_size
+        )
+
+        return cls(
+            origin,
+            transmitter[0]['geometry']['coordinates'],
+            site_area[0]['geometry']['coordinates'][0],
+            site_area[0]['properties']['site_id'],
+            [i['geometry']['coordinates'] for i in interfering_transmitters],
+            [i['geometry']['coordinates'][0] for i in interfering_site_areas],
+            [i['properties']['site_id'] for i in interfering_site_areas],
+            candidates[receiver_mask],
+            receiver_mask,
+        )
+
+
+    def sites_and_site_areas(self, site_radius):
+        """
+
+        Scale the template to a site radius, giving the same outputs as
+        `produce_sites_and_site_areas`.
+
+        Parameters
+        ----------
+        site_radius : int
+            Distance between transmitter and site edge in meters.
+
+        Returns
+        -------
+        transmitter : List of dicts
+            Contains a geojson dict for the transmitter site.
+        interfering_transmitters : List of dicts
+            Contains multiple geojson dicts for the interfering transmitter
+            sites.
+        site_area : List of dicts
+            Contains a geojson dict for the transmitter site area.
+        interfering_site_areas : List of dicts
+            Contains multiple geojson dicts for the interfering transmitter
+            site areas.
+
+        """
+        transmitter = [{
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Point',
+                'coordinates': tuple(self._scale(self.transmitter, site_radius)),
+                },
+            'properties': {
+                'site_id': 'transmitter'
+                }
+            }]
+
+        site_area = [
+            _hexagon_feature(
+                self._scale(self.site_area, site_radius),
+                self._scale(self.transmitter, site_radius),
+                self.site_area_id
+            )
+        ]
+
+        interferers = self._scale(self.interferers, site_radius).tolist()
+        interfering_site_areas = self._scale(
+            self.interfering_site_areas, site_radius)
+
+        interfering_transmitters = []
+        int_site_areas = []
+        for site_id, coordinates, polygon in zip(
+            self.interfering_site_ids.tolist(), interferers,
+            interfering_site_areas):
+
+            interfering_transmitters.append({
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': tuple(coordinates),
+                    },
+                'properties': {
+                    'site_id': site_id
+                    }
+                })
+
+            int_site_areas.append(
+                _hexagon_feature(polygon, coordinates, site_id)
+            )
+
+        return transmitter, interfering_transmitters, site_area, int_site_areas
+
+
+    def receiver_coordinates(self, site_radius):
+        """
+
+        Scale the grid receivers to a site radius.
+
+        Parameters
+        ----------
+        site_radius : int
+            Distance between transmitter and site edge in meters.
+
+        Returns
+        -------
+        coordinates : numpy.ndarray
+            (K, 2) projected receiver coordinates.
+
+        """
+        return self._scale(self.receivers, site_radius)
+
+
+    def save(self, path):
+        """
+
+        Persist the template to a .npz file.
+
+        """
+        np.savez(path,
+            origin=self.origin,
+            transmitter=self.transmitter,
+            site_area=self.site_area,
+            site_area_id=self.site_area_id,
+            interferers=self.interferers,
+            interfering_site_areas=self.interfering_site_areas,
+            interfering_site_ids=self.interfering_site_ids,
+            receivers=self.receivers,
+            receiver_mask=self.receiver_mask,
+        )
+
+
+    @classmethod
+    def load(cls, path):
+        """
+
+        Load a template persisted with `save`.
+
+        """
+        with np.load(path) as data:
+            return cls(
+                data['origin'],
+                data['transmitter'],
+                data['site_area'],
+                data['site_area_id'],
+                data['interferers'],
+                data['interfering_site_areas'],
+                data['interfering_site_ids'],
+                data['receivers'],
+                data['receiver_mask'],
+            )
+
+
+    def _scale(self, unit_coordinates, site_radius):
+        return self.origin + unit_coordinates * site_radius
+
+
+_SITE_LAYOUT_TEMPLATES = {}
+
+
+def get_site_layout_template(unprojected_point, unprojected_crs, projected_crs,
+    rings=1, grid_size=50, directory=None):
+    """
+
+    Return the unit site layout for an origin point, computing it at most
+    once per run and optionally persisting it to disk between runs.
+
+    Parameters
+    ----------
+    unprojected_point : Tuple
+        x and y coordinates for an unprojected point.
+    unprojected_crs : string
+        Original Coordinate Reference System.
+    projected_crs : string
+        Projected Coordinate Reference System.
+    rings : int
+        Number of hex rings of interfering sites.
+    grid_size : int
+        Number of grid receiver candidates along each axis.
+    directory : string, optional
+        Folder to read and write persisted templates.
+
+    Returns
+    -------
+    template : SiteLayoutTemplate
+        Unit site layout.
+
+    """
+    key = (tuple(unprojected_point), unprojected_crs, projected_crs, rings,
+        grid_size)
+
+    if key in _SITE_LAYOUT_TEMPLATES:
+        return _SITE_LAYOUT_TEMPLATES[key]
+
+    path = None
+    if directory is not None:
+        filename = 'site_layout_{}_{}_{}_{}_{}_{}.npz'.format(
+            unprojected_point[0], unprojected_point[1],
+            unprojected_crs.replace(':', ''), projected_crs.replace(':', ''),
+            rings, grid_size)
+        path = os.path.join(directory, filename)
+
+    if path is not None and os.path.exists(path):
+        template = SiteLayoutTemplate.load(path)
+    else:
+        point = convert_point_to_projected_crs(unprojected_point,
+            unprojected_crs, projected_crs
+        )
+        origin = (point['geometry'].x, point['geometry'].y)
+
+        template = SiteLayoutTemplate.build(origin, rings, grid_size)
+
+        if path is not None:
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            template.save(path)
+
+    _SITE_LAYOUT_TEMPLATES[key] = template
+
+    return template
+
+
+def generate_grid_receiver_positions(site_area, grid_size):
+    """
+
+    Generate a regular grid of receiver candidates over the site area
+    bounds, flagging those that fall inside the site area.
+
+    Parameters
+    ----------
+    site_area : dict
+        Geojson site area.
+    grid_size : int
+        Number of grid candidates along each axis (the grid resolution).
+
+    Returns
+    -------
+    candidates : numpy.ndarray
+        (grid_size ** 2, 2) candidate coordinates, in the same order as
+        the grid generated by `generate_receivers`.
+    inside : numpy.ndarray
+        (grid_size ** 2,) boolean flags for candidates inside the area.
+
+    """
+    vertices = np.asarray(site_area['geometry']['coordinates'][0], dtype=float)
+    minx, miny = vertices.min(axis=0)
+    maxx, maxy = vertices.max(axis=0)
+
+    x_axis = np.linspace(minx, maxx, num=grid_size)
+    y_axis = np.linspace(miny, maxy, num=grid_size)
+
+    xv, yv = np.meshgrid(x_axis, y_axis, sparse=False, indexing='ij')
+    candidates = np.column_stack((xv.ravel(), yv.ravel()))
+
+    inside = points_in_polygon(candidates, vertices)
+
+    return candidates, inside
+
+
+def points_in_polygon(points, vertices):
+    """
+
+    Test which points lie strictly inside a convex polygon, such as a
+    hexagon, in one array operation per edge. Points on the boundary
+    are outside, as with shapely's `contains`.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        (n, 2) point coordinates.
+    vertices : numpy.ndarray
+        (v, 2) polygon vertices, optionally closed (first vertex repeated).
+
+    Returns
+    -------
+    inside : numpy.ndarray
+        (n,) boolean flags for points inside the polygon.
+
+    """
+    points = np.asarray(points, dtype=float)
+    vertices = np.asarray(vertices, dtype=float)
+
+    if (vertices[0] == vertices[-1]).all():
+        vertices = vertices[:-1]
+
+    following = np.roll(vertices, -1, axis=0)
+
+    # +1 for counter-clockwise and -1 for clockwise vertex order
+    orientation = np.sign(np.sum(
+        vertices[:, 0] * following[:, 1] - following[:, 0] * vertices[:, 1]))
+
+    inside = np.ones(len(points), dtype=bool)
+
+    for start, end in zip(vertices, following):
+        cross = ((end[0] - start[0]) * (points[:, 1] - start[1]) -
+            (end[1] - start[1]) * (points[:, 0] - start[0]))
+        inside &= cross * orientation > 0
+
+    return inside
+
+
+def _hexagon_feature(polygon, centroid, site_id):
+    """
+    Build a geojson site area dict from hexagon vertices.
+    """
+    return {
+        'type': 'Feature',
+        'geometry': {
+            'type': 'Polygon',
+            'coordinates': [[tuple(vertex) for vertex in polygon.tolist()]],
+        },
+        'centroid': Point(centroid),
+        'properties': {
+            'site_id': site_id
+            }
+        }
@@ -0,0 +1,288 @@
+"""
+In-memory capacity lookup table.
+
+Loads a capacity lookup table, as written by `write_frequency_lookup_table`
+or a sweep, into NumPy arrays sorted by (environment, frequency_GHz,
+generation, ant_type, confidence_interval) and then site density, so
+vectorized queries interpolate between simulated site radii without
+scanning the file.
+
+"""
+import csv
+from collections import OrderedDict
+
+import numpy as np
+
+KEY_COLUMNS = (
+    'environment',
+    'frequency_GHz',
+    'generation',
+    'ant_type',
+    'confidence_interval',
+)
+
+
+class CapacityLUT(object):
+    """
+
+    Capacity lookup table indexed by (environment, frequency_GHz,
+    generation, ant_type, confidence_interval), with the site densities
+    of each key sorted for interpolation.
+
+    Parameters
+    ----------
+    columns : dict
+        Lookup table columns as arrays of equal length, including
+        'sites_per_km2', the key columns and any metric columns.
+
+    """
+    def __init__(self, columns):
+
+        keys = list(zip(*(np.asarray(columns[column]).tolist()
+            for column in KEY_COLUMNS)))
+        density = np.asarray(columns['sites_per_km2'], dtype=float)
+
+        self.index = OrderedDict()
+        for key in sorted(set(keys)):
+            self.index[key] = len(self.index)
+
+        # distinct values of each key column, and the index of each
+        # combination of them (-1 where the table has no rows)
+        self.levels = [sorted(set(values)) for values in zip(*self.index)]
+        self.lookup = np.full([len(levels) for levels in self.levels], -1,
+            dtype=np.int64)
+        for key, code in self.index.items():
+            self.lookup[tuple(levels.index(value) for levels, value in
+                zip(self.levels, key))] = code
+
+        codes = np.array([self.index[key] for key in keys], dtype=np.int64)
+        order = np.lexsort((density, codes))
+
+        self.codes = codes[order]
+        self.sites_per_km2 = density[order]
+
+        self.columns = OrderedDict()
+        for column, values in columns.items():
+            if column in KEY_COLUMNS or column == 'sites_per_km2':
+                continue
+            values = np.asarray(values)
+            if values.dtype.kind in 'iuf':
+                self.columns[column] = values[order].astype(float)
+
+        # rows of key i are bounds[i]:bounds[i + 1]
+        self.bounds = np.searchsorted(self.codes, np.arange(len(self.index) + 1))
+
+        repeated = (np.diff(self.codes) == 0) & (np.diff(self.sites_per_km2) == 0)
+        if repeated.any():
+            key = list(self.index)[self.codes[np.argmax(repeated)]]
+            raise ValueError('Repeated site density for {}, e.g. from more '
+                'than one bandwidth'.format(dict(zip(KEY_COLUMNS, key))))
+
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+
+        Load a capacity lookup table from a .csv file.
+
+        Parameters
+        ----------
+        path : string
+            Path of the capacity lookup table.
+
+        Returns
+        -------
+        lut : CapacityLUT
+            Indexed lookup table.
+
+        """
+        with open(path, newline='') as lut_file:
+            reader = csv.reader(lut_file)
+            header = next(reader)
+            values = list(zip(*reader))
+
+        if not values:
+            values = [()] * len(header)
+
+        columns = OrderedDict()
+        for column, column_values in zip(header, values):
+            if column in ('environment', 'generation', 'ant_type',
+                'transmission_type'):
+                columns[column] = np.array(column_values, dtype=object)
+            elif column == 'confidence_interval':
+                columns[column] = np.array(column_values, dtype=float).astype(int)
+            else:
+                columns[column] = np.array(column_values, dtype=float)
+
+        return cls(columns)
+
+
+    def __len__(self):
+        return len(self.codes)
+
+
+    def keys(self):
+        """
+
+        Return the (environment, frequency_GHz, generation, ant_type,
+        confidence_interval) keys of the table.
+
+        """
+        return list(self.index)
+
+
+    def capacity(self, environment, frequency, generation, ant_type,
+        confidence_interval, sites_per_km2, column='capacity_mbps_km2',
+        clip=False):
+        """
+
+        Interpolate a metric at the given site densities.
+
+        All arguments broadcast against each other, so one call can answer
+        any number of queries.
+
+        Parameters
+        ----------
+        environment : string or array of strings
+            Environment, e.g. 'urban'.
+        frequency : float or array of floats
+            Carrier frequency in GHz.
+        generation : string or array of strings
+            Cellular generation, e.g. '4G'.
+        ant_type : string or array of strings
+            Type of transmitters, e.g. 'macro'.
+        confidence_interval : int or array of ints
+            Confidence interval, e.g. 50.
+        sites_per_km2 : float or array of floats
+            Site densities to query.
+        column : string
+            Lookup table column to interpolate.
+        clip : bool
+            If True, densities outside the simulated range take the value
+            at the nearest end, otherwise they are NaN.
+
+        Returns
+        -------
+        values : float or numpy.ndarray
+            Interpolated values, in the broadcast shape of the arguments.
+
+        """
+        codes, sites_per_km2 = self._broadcast(environment, frequency,
+            generation, ant_type, confidence_interval, sites_per_km2)
+        values = self.columns[column]
+
+        output = np.full(codes.shape, np.nan)
+
+        for code in np.unique(codes):
+            queries = codes == code
+            start, stop = self.bounds[code], self.bounds[code + 1]
+
+            left = right = None if clip else np.nan
+            output[queries] = np.interp(sites_per_km2[queries],
+                self.sites_per_km2[start:stop], values[start:stop],
+                left=left, right=right)
+
+        return output if output.ndim else output.item()
+
+
+    def required_sites_per_km2(self, environment, frequency, generation,
+        ant_type, confidence_interval, capacity, column='capacity_mbps_km2',
+        clip=False):
+        """
+
+        Find the site density needed to reach a target value of a metric,
+        the inverse of `capacity`.
+
+        This is the lowest density at which the interpolated metric first
+        reaches the target. Targets above the largest simulated value are
+        NaN, as are targets below the value at the lowest simulated
+        density unless `clip` is True, in which case that density is
+        returned.
+
+        Parameters
+        ----------
+        environment, frequency, generation, ant_type, confidence_interval
+            Keys of the lookup table, as for `capacity`.
+        capacity : float or array of floats
+            Target values, e.g. in Mbps/km^2.
+        column : string
+            Lookup table column the target refers to.
+        clip : bool
+            Whether targets below the simulated range return the lowest
+            simulated density rather than NaN.
+
+        Returns
+        -------
+        sites_per_km2 : float or numpy.ndarray
+            Site densities, in the broadcast shape of the arguments.
+
+        """
+        codes, capacity = self._broadcast(environment, frequency, generation,
+            ant_type, confidence_interval, capacity)
+        values = self.columns[column]
+
+        output = np.full(codes.shape, np.nan)
+
+        for code in np.unique(codes):
+            queries = codes == code
+            start, stop = self.bounds[code], self.bounds[code + 1]
+
+            density = self.sites_per_km2[start:stop]
+            # best value reached at or below each density
+            envelope = np.maximum.accumulate(values[start:stop])
+            target = capacity[queries]
+
+            upper = np.searchsorted(envelope, target, side='left')
+            lower = np.maximum(upper - 1, 0)
+            reached = np.minimum(upper, len(density) - 1)
+
+            span = envelope[reached] - envelope[lower]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fraction = np.where(span > 0,
+                    (target - envelope[lower]) / span, 0)
+
+            result = density[lower] + fraction * (density[reached] - density[lower])
+            if not clip:
+                result[target < envelope[0]] = np.nan
+            result[upper == len(density)] = np.nan
+
+            output[queries] = result
+
+        return output if output.ndim else output.item()
+
+
+    def _broadcast(self, environment, frequency, generation, ant_type,
+        confidence_interval, values):
+        """
+        Broadcast the query arguments, returning the index code of each
+        query and the query values as float arrays.
+        """
+        positions = []
+        for column, query, levels in zip(KEY_COLUMNS, (environment,
+            frequency, generation, ant_type, confidence_interval), self.levels):
+
+            query = np.asarray(query)
+            position = np.full(query.shape, -1, dtype=np.int64)
+            # compare against the few distinct values rather than sorting
+            for i, level in enumerate(levels):
+                position[query == level] = i
+
+            if (position < 0).any():
+                raise KeyError('No lookup table rows for {} {}'.format(
+                    column, query[position < 0].ravel()[0]))
+
+            positions.append(position)
+
+        *positions, values = np.broadcast_arrays(*positions,
+            np.asarray(values, dtype=float))
+        codes = self.lookup[tuple(positions)]
+
+        if (codes < 0).any():
+            missing = tuple(positions)
+            first = np.argmax((codes < 0).ravel())
+            key = [levels[position.ravel()[first]] for levels, position in
+                zip(self.levels, missing)]
+            raise KeyError('No lookup table rows for {}'.format(
+                dict(zip(KEY_COLUMNS, key))))
+
+        return codes, values
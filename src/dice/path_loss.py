@@ -15,11 +15,14 @@ Monte Carlo simulation methodology for the use in sharing and compatibility
 studies between different radio services or systems.
 
 """
+import zlib
+from functools import lru_cache
 import numpy as np
-from math import pi, sqrt, log10
 
+SHADOW_FADING_CACHE_SIZE = 256
 
-def path_loss_calculator(distance, frequency, simulation_parameters):
+
+def path_loss_calculator(distance, frequency, simulation_parameters, rng=None):
     """
     Calculate the free space path loss in decibels.
 
@@ -29,46 +32,107 @@ def path_loss_calculator(distance, frequency, simulation_parameters):
 
     Parameters
     ----------
-    distance : float
-        Distance between transmitter and receiver in metres.
+    distance : float or numpy.ndarray
+        Distance between transmitter and receiver in metres. Arrays of
+        distances are evaluated element-wise.
+    frequency : float or numpy.ndarray
+        Carrier frequency in GHz. An array of frequencies broadcasts
+        against `distance`, with a random variation for each frequency.
     simulation_parameters : dict
         Contains all simulation parameters.
-    i : int
-        Iteration number.
-    random_variation : list
-        List of random variation components.
+    rng : numpy.random.Generator or numpy.random.SeedSequence, optional
+        Explicit random stream for the stochastic component. By default
+        a fixed variation is derived from each frequency.
 
     Returns
     -------
-    path_loss : float
+    path_loss : float or numpy.ndarray
         The free space path loss over the given distance.
-    random_variation : float
+    random_variation : float or numpy.ndarray
         Stochastic component.
 
     """
+    path_loss = free_space_path_loss(distance, frequency)
 
-    path_loss = 20*log10(distance) + 20*log10(frequency) + 32.44
+    if np.ndim(frequency) == 0:
+        random_variation = generate_log_normal_dist_value(
+            frequency,
+            2, #simulation_parameters['mu'],
+            10, #simulation_parameters['sigma'],
+            39, #simulation_parameters['seed_value'],
+            10, #simulation_parameters['iterations']
+            rng=rng,
+        )[0]
+    else:
+        random_variation = np.array([
+            generate_log_normal_dist_value(f, 2, 10, 39, 10, rng=rng)[0]
+            for f in np.ravel(frequency)
+        ]).reshape(np.shape(frequency))
 
-    random_variations = generate_log_normal_dist_value(
-        frequency,
-        2, #simulation_parameters['mu'],
-        10, #simulation_parameters['sigma'],
-        39, #simulation_parameters['seed_value'],
-        10, #simulation_parameters['iterations']
-    )
+    return path_loss + random_variation, random_variation
 
-    random_variation = random_variations[0]
 
-    return path_loss + random_variation, random_variation
+def free_space_path_loss(distance, frequency):
+    """
+    Calculate the deterministic free space path loss in decibels,
+    without any stochastic component.
 
+    Parameters
+    ----------
+    distance : float or numpy.ndarray
+        Distance between transmitter and receiver in metres.
+    frequency : float or numpy.ndarray
+        Carrier frequency in GHz.
 
-def generate_log_normal_dist_value(frequency, mu, sigma, seed_value, draws):
+    Returns
+    -------
+    path_loss : float or numpy.ndarray
+        The free space path loss over the given distance.
+
+    """
+    return 20*np.log10(distance) + 20*np.log10(frequency) + 32.44
+
+
+def generate_shadow_fading(rng, size, mu=2, sigma=10):
+    """
+    Draw a tensor of lognormal shadow fading values in one call, using
+    the same parameterization as `generate_log_normal_dist_value`.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        Random number generator to draw from.
+    size : tuple
+        Shape of the output, e.g. (iterations, receivers, transmitters).
+    mu : int
+        Mean of the desired distribution.
+    sigma : int
+        Standard deviation of the desired distribution.
+
+    Returns
+    -------
+    random_variation : numpy.ndarray
+        Random variation values of the given shape.
+
+    """
+    normal_std = np.sqrt(np.log10(1 + (sigma/mu)**2))
+    normal_mean = np.log10(mu) - normal_std**2 / 2
+
+    return rng.lognormal(normal_mean, normal_std, size)
+
+
+def generate_log_normal_dist_value(frequency, mu, sigma, seed_value, draws,
+    rng=None):
     """
     Generates random values using a lognormal distribution, given a specific mean (mu)
     and standard deviation (sigma).
     Original function in pysim5G/path_loss.py.
     The parameters mu and sigma in np.random.lognormal are not the mean and STD of the
     lognormal distribution. They are the mean and STD of the underlying normal distribution.
+    The global numpy random state is never reseeded, so calls are safe in
+    threads and parallel workers. Seeded draws are the same on every call
+    for a given frequency, so they are served from a bounded LRU cache
+    (see `shadow_fading_cache_info`) as read-only arrays.
     Parameters
     ----------
     frequency : float
@@ -81,20 +145,123 @@ def generate_log_normal_dist_value(frequency, mu, sigma, seed_value, draws):
         Starting point for pseudo-random number generator.
     draws : int
         Number of required values.
+    rng : numpy.random.Generator or numpy.random.SeedSequence, optional
+        Explicit random stream to draw from, in which case `seed_value`
+        is ignored. Otherwise a private random state is seeded from
+        `seed_value` and the frequency.
     Returns
     -------
     random_variation : float
         Mean of the random variation over the specified itations.
     """
-    if seed_value == None:
-        pass
+    if rng is not None:
+        random_state = as_generator(rng)
+    elif seed_value == None:
+        random_state = np.random
     else:
-        frequency_seed_value = seed_value * frequency * 100
-        np.random.seed(int(str(frequency_seed_value)[:2]))
+        return _cached_log_normal_dist_value(
+            frequency, mu, sigma, seed_value, draws)
+
+    normal_std = np.sqrt(np.log10(1 + (sigma/mu)**2))
+    normal_mean = np.log10(mu) - normal_std**2 / 2
+
+    random_variation  = random_state.lognormal(normal_mean, normal_std, draws)
+
+    return random_variation
+
+
+@lru_cache(maxsize=SHADOW_FADING_CACHE_SIZE)
+def _cached_log_normal_dist_value(frequency, mu, sigma, seed_value, draws):
+    """
+    Seeded lognormal draws for `generate_log_normal_dist_value`, cached on
+    (frequency, mu, sigma, seed_value, draws).
+    """
+    frequency_seed_value = seed_value * frequency * 100
+    random_state = np.random.RandomState(int(str(frequency_seed_value)[:2]))
 
     normal_std = np.sqrt(np.log10(1 + (sigma/mu)**2))
     normal_mean = np.log10(mu) - normal_std**2 / 2
 
-    random_variation  = np.random.lognormal(normal_mean, normal_std, draws)
+    random_variation  = random_state.lognormal(normal_mean, normal_std, draws)
+    random_variation.flags.writeable = False
 
     return random_variation
+
+
+def shadow_fading_cache_info():
+    """
+    Return the hits, misses, maximum size and current size of the
+    shadow fading cache.
+
+    Returns
+    -------
+    info : functools._CacheInfo
+        Named tuple of (hits, misses, maxsize, currsize).
+
+    """
+    return _cached_log_normal_dist_value.cache_info()
+
+
+def clear_shadow_fading_cache():
+    """
+    Empty the shadow fading cache and reset its counters.
+    """
+    _cached_log_normal_dist_value.cache_clear()
+
+
+def as_generator(rng):
+    """
+    Return a numpy Generator for a Generator, SeedSequence or integer seed.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator, numpy.random.SeedSequence or int
+        Random stream or seed.
+
+    Returns
+    -------
+    generator : numpy.random.Generator
+        Random number generator.
+
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+
+    return np.random.default_rng(rng)
+
+
+def generate_stream(seed_value, *keys):
+    """
+    Create an independent random stream identified by a seed value and a
+    set of keys, e.g. an environment, a band and a worker.
+
+    The stream only depends on its seed value and keys, so results are
+    the same regardless of which worker, or in which order, it is used.
+
+    Parameters
+    ----------
+    seed_value : int
+        Starting point for pseudo-random number generator.
+    *keys : int, float or string
+        Identify the stream, e.g. ('urban', 0.8).
+
+    Returns
+    -------
+    generator : numpy.random.Generator
+        Random number generator for the stream.
+
+    """
+    entropy = [int(seed_value)] + [_stream_key(key) for key in keys]
+
+    return np.random.default_rng(np.random.SeedSequence(entropy))
+
+
+def _stream_key(key):
+    """
+    Map a stream key to a non-negative integer that is stable across
+    processes (unlike the built-in hash of a string).
+    """
+    if isinstance(key, (int, np.integer)) and key >= 0:
+        return int(key)
+
+    return zlib.crc32(repr(key).encode('utf-8'))
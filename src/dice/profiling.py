@@ -0,0 +1,146 @@
+"""
+Opt-in timing of simulation stages.
+
+A `StageTimings` passed to `SimulationManager` (or enabled on a
+`SweepRunner`) records the cumulative wall time and number of calls of
+each link budget stage, and the receivers processed. Without one, stages
+are entered through a shared no-op context, so the cost is a single
+attribute check per stage and batch.
+
+"""
+import json
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+
+NO_TIMING = nullcontext()
+
+
+def timed(timings, name):
+    """
+
+    Context for timing a stage with `timings`, doing nothing if they are
+    None.
+
+    """
+    if timings is None:
+        return NO_TIMING
+
+    return timings.stage(name)
+
+
+class StageTimings(object):
+    """
+
+    Cumulative wall time and call count of each stage, plus the number
+    of receivers processed (counted once per band or iteration).
+
+    """
+    def __init__(self):
+        self.seconds = OrderedDict()
+        self.calls = OrderedDict()
+        self.receivers = 0
+
+
+    def stage(self, name):
+        """
+
+        Context manager timing one call of a stage.
+
+        """
+        return _Stage(self, name)
+
+
+    def add(self, name, seconds, calls=1):
+        """
+
+        Record time spent in a stage.
+
+        """
+        self.seconds[name] = self.seconds.get(name, 0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+
+    def update(self, other):
+        """
+
+        Add the timings of another `StageTimings`, or of its `to_dict`.
+
+        """
+        if isinstance(other, StageTimings):
+            other = other.to_dict()
+
+        for name, stage in other['stages'].items():
+            self.add(name, stage['seconds'], stage['calls'])
+        self.receivers += other['receivers']
+
+
+    @property
+    def total(self):
+        return sum(self.seconds.values())
+
+
+    def to_dict(self):
+        """
+
+        Convert the timings to a dict, suitable for JSON.
+
+        Returns
+        -------
+        timings : OrderedDict
+            Receivers processed, total seconds and the seconds and calls
+            of each stage.
+
+        """
+        return OrderedDict([
+            ('receivers', self.receivers),
+            ('seconds', self.total),
+            ('stages', OrderedDict(
+                (name, OrderedDict([
+                    ('seconds', self.seconds[name]),
+                    ('calls', self.calls[name]),
+                ]))
+                for name in self.seconds
+            )),
+        ])
+
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+    def summary(self):
+        """
+
+        Describe each stage's share of the total time.
+
+        """
+        total = self.total
+
+        lines = ['{:<24} {:>10} {:>8} {:>7}'.format(
+            'stage', 'seconds', 'calls', 'share')]
+        for name, seconds in self.seconds.items():
+            lines.append('{:<24} {:>10.4f} {:>8} {:>6.1f}%'.format(
+                name, seconds, self.calls[name],
+                100 * seconds / total if total else 0))
+
+        return '\n'.join(lines)
+
+
+class _Stage(object):
+
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
@@ -0,0 +1,373 @@
+"""
+Columnar containers for simulation results.
+
+Results are held as one NumPy array per metric (struct-of-arrays), with
+metrics that are constant across all receivers stored once. Conversion
+to dicts, pandas or Arrow only happens when a caller asks for it.
+
+"""
+import numpy as np
+from collections import OrderedDict
+
+
+class LinkBudgetResults(object):
+    """
+
+    Columnar store of link budget results, one row per receiver.
+
+    Parameters
+    ----------
+    data : dict
+        Ordered mapping of metric name to either a length N array (one
+        value per receiver) or a scalar shared by all receivers.
+
+    """
+    def __init__(self, data):
+
+        self.fields = []
+        self.columns = OrderedDict()
+        self.constants = OrderedDict()
+
+        for name, value in data.items():
+            self.fields.append(name)
+            if np.ndim(value) == 0:
+                self.constants[name] = value
+            else:
+                self.columns[name] = np.asarray(value)
+
+        lengths = set(len(value) for value in self.columns.values())
+        if len(lengths) > 1:
+            raise ValueError(
+                'All result columns must have the same length: {}'.format(
+                    sorted(lengths)))
+
+        self.length = lengths.pop() if lengths else 0
+
+
+    def __len__(self):
+        return self.length
+
+
+    def __getitem__(self, name):
+        """
+
+        Return a metric as a length N array. Constant metrics are
+        broadcast without copying.
+
+        """
+        if name in self.columns:
+            return self.columns[name]
+
+        return np.broadcast_to(np.asarray(self.constants[name]), (self.length,))
+
+
+    def __contains__(self, name):
+        return name in self.columns or name in self.constants
+
+
+    def __iter__(self):
+        """
+
+        Iterate over results as dicts, one per receiver.
+
+        """
+        names = list(self.columns.keys())
+        values = [column.tolist() for column in self.columns.values()]
+
+        for row in zip(*values):
+            result = dict(self.constants)
+            result.update(zip(names, row))
+            yield {name: result[name] for name in self.fields}
+
+
+    def to_dicts(self):
+        """
+
+        Convert the results to a list of dicts, one per receiver.
+
+        Returns
+        -------
+        results : list of dicts
+            Each dict is an individual simulation result.
+
+        """
+        return list(self)
+
+
+    def to_pandas(self):
+        """
+
+        Convert the results to a pandas DataFrame. Numeric columns share
+        memory with the underlying arrays.
+
+        Returns
+        -------
+        df : pandas.DataFrame
+            One row per receiver and one column per metric.
+
+        """
+        import pandas as pd
+
+        return pd.DataFrame(
+            OrderedDict((name, self[name]) for name in self.fields),
+            copy=False
+        )
+
+
+    def to_arrow(self):
+        """
+
+        Convert the results to a pyarrow Table. Numeric columns share
+        memory with the underlying arrays, while constant metrics are
+        dictionary encoded.
+
+        Returns
+        -------
+        table : pyarrow.Table
+            One row per receiver and one column per metric.
+
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for name in self.fields:
+            if name in self.columns:
+                arrays.append(pa.array(self.columns[name]))
+            else:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(np.zeros(self.length, dtype=np.int32)),
+                    pa.array([self.constants[name]])
+                ))
+
+        return pa.Table.from_arrays(arrays, names=self.fields)
+
+
+class TDigest(object):
+    """
+
+    Streaming quantile sketch (merging t-digest).
+
+    Values are buffered and merged into weighted centroids, with cluster
+    sizes bounded by the arcsine scale function, so memory stays
+    proportional to `compression` however many values are added. Larger
+    `compression` gives a tighter error bound, most accurate in the tails.
+
+    Parameters
+    ----------
+    compression : int
+        Compression (delta) of the digest, roughly the maximum number of
+        centroids kept.
+
+    """
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.buffer_size = 10 * compression
+
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+        self._buffer = []
+        self._buffered = 0
+
+
+    def update(self, values):
+        """
+
+        Add an array of values to the digest.
+
+        """
+        values = np.asarray(values, dtype=float).ravel()
+
+        if len(values) == 0:
+            return
+
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        self._buffer.append(values)
+        self._buffered += len(values)
+
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+
+    def percentile(self, q):
+        """
+
+        Estimate the q-th percentile (0-100) of all values added so far.
+
+        """
+        self._compress()
+
+        if self.count == 0:
+            return np.nan
+
+        cumulative = np.cumsum(self.weights) - self.weights / 2
+
+        return float(np.interp(
+            q / 100 * self.count,
+            np.concatenate(([0], cumulative, [self.count])),
+            np.concatenate(([self.min], self.means, [self.max]))
+        ))
+
+
+    def _compress(self):
+        if not self._buffer:
+            return
+
+        means = np.concatenate([self.means] + self._buffer)
+        weights = np.concatenate(
+            [self.weights, np.ones(self._buffered)])
+
+        self._buffer = []
+        self._buffered = 0
+
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+
+        # arcsine scale function: clusters span at most one unit of k
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        clusters = np.floor(k - k[0]).astype(int)
+
+        merged_weights = np.bincount(clusters, weights=weights)
+        merged_means = np.bincount(clusters, weights=means * weights)
+
+        populated = merged_weights > 0
+        self.weights = merged_weights[populated]
+        self.means = merged_means[populated] / self.weights
+
+
+class ExactQuantiles(object):
+    """
+
+    Exact percentiles with the same interface as `TDigest`, keeping every
+    value. Intended for validating sketches.
+
+    """
+    def __init__(self):
+        self.chunks = []
+        self.count = 0
+
+
+    def update(self, values):
+        """
+
+        Add an array of values.
+
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        self.chunks.append(values)
+        self.count += len(values)
+
+
+    def percentile(self, q):
+        """
+
+        Return the exact q-th percentile (0-100) of all values added.
+
+        """
+        return np.percentile(np.concatenate(self.chunks), q)
+
+
+class PercentileAggregator(object):
+    """
+
+    Streaming confidence interval rows for link budget results.
+
+    Results can be fed in chunks as they are produced, and the 5/50/95
+    (or other) rows are produced at the end in constant memory. Metrics
+    where lower values are better (path loss, interference and noise)
+    use the confidence interval directly, while the others use
+    100 - confidence interval.
+
+    Parameters
+    ----------
+    confidence_intervals : list of ints
+        Confidence intervals to report, e.g. [5, 50, 95].
+    exact : bool
+        If True, keep every value and compute exact percentiles.
+    compression : int
+        Compression of the t-digest sketches when `exact` is False.
+
+    """
+    LOWER_IS_BETTER = OrderedDict([
+        ('path_loss', True),
+        ('received_power', False),
+        ('interference', True),
+        ('noise', True),
+        ('sinr', False),
+        ('spectral_efficiency', False),
+        ('capacity_mbps', False),
+        ('capacity_mbps_km2', False),
+    ])
+
+    def __init__(self, confidence_intervals, exact=False, compression=100):
+
+        self.confidence_intervals = confidence_intervals
+
+        self.sketches = OrderedDict()
+        for metric in self.LOWER_IS_BETTER:
+            if exact:
+                self.sketches[metric] = ExactQuantiles()
+            else:
+                self.sketches[metric] = TDigest(compression)
+
+
+    def update(self, results):
+        """
+
+        Add a chunk of results.
+
+        Parameters
+        ----------
+        results : LinkBudgetResults or dict of arrays
+            Results for a chunk of receivers (or iterations).
+
+        """
+        for metric, sketch in self.sketches.items():
+            sketch.update(results[metric])
+
+
+    def percentile_values(self, transmission_type):
+        """
+
+        Get the value of each metric at each confidence interval.
+
+        Parameters
+        ----------
+        transmission_type : string
+            The transmission type (SISO, MIMO etc.).
+
+        Returns
+        -------
+        output : list of dicts
+            One dict per confidence interval.
+
+        """
+        output = []
+
+        for confidence_interval in self.confidence_intervals:
+
+            row = OrderedDict([
+                ('confidence_interval', confidence_interval),
+                ('tranmission_type', transmission_type),
+            ])
+
+            for metric, lower_is_better in self.LOWER_IS_BETTER.items():
+                if lower_is_better:
+                    percentile = confidence_interval
+                else:
+                    percentile = 100 - confidence_interval
+                row[metric] = self.sketches[metric].percentile(percentile)
+
+            output.append(dict(row))
+
+        return output
@@ -0,0 +1,1015 @@
+"""
+Parallel parameter sweeps.
+
+Runs the environment x site radius x spectrum band grid of simulations
+across a process pool, and merges the capacity lookup table in a stable
+sorted order, so the output is the same for any number of workers.
+Completed jobs can be recorded in a manifest, so an interrupted sweep
+resumes where it stopped.
+
+"""
+import os
+import csv
+import json
+import time
+import hashlib
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from dice.path_loss import generate_stream
+from dice.profiling import StageTimings, timed
+from dice.results import PercentileAggregator
+from dice.system_simulator import SimulationManager, ReceiverSet
+from dice.writers import LutWriter, lut_rows, LUT_HEADER
+
+# largest change across an interval of site radii before adaptive sweeps
+# refine it, by lookup table column
+REFINEMENT_TOLERANCES = OrderedDict([
+    ('sinr_dB', 0.5),
+    ('capacity_mbps', 5),
+])
+
+class SweepJob(namedtuple('SweepJob', [
+    'environment', 'ant_type', 'site_radius', 'frequency', 'bandwidth',
+    'generation', 'transmission_type'])):
+    """
+
+    One (environment, ant_type, site_radius, band) combination of a sweep.
+    Jobs sort in the order their rows appear in the lookup table.
+
+    """
+    __slots__ = ()
+
+    @property
+    def band(self):
+        return (self.frequency, self.bandwidth, self.generation,
+            self.transmission_type)
+
+
+def sweep_jobs(environments, ant_types, site_radii, spectrum_portfolio,
+    max_site_radius=None):
+    """
+
+    Enumerate the jobs of a sweep.
+
+    Parameters
+    ----------
+    environments : list of strings
+        Environments to simulate.
+    ant_types : list of strings
+        Types of transmitters to simulate.
+    site_radii : dict or iterable
+        Either a dict of site radii by ant_type then environment, or site
+        radii shared by all of them.
+    spectrum_portfolio : list of tuples
+        Bands as (frequency, bandwidth, generation, transmission_type).
+    max_site_radius : dict, optional
+        Largest site radius to simulate in each environment.
+
+    Returns
+    -------
+    jobs : list of SweepJobs
+        Sorted, unique jobs.
+
+    """
+    max_site_radius = max_site_radius or {}
+
+    jobs = set()
+
+    for environment in environments:
+        for ant_type in ant_types:
+
+            if isinstance(site_radii, dict):
+                radii = site_radii[ant_type][environment]
+            else:
+                radii = site_radii
+
+            for site_radius in radii:
+
+                if site_radius > max_site_radius.get(environment, np.inf):
+                    continue
+
+                for band in spectrum_portfolio:
+                    jobs.add(SweepJob(environment, ant_type, site_radius, *band))
+
+    return sorted(jobs)
+
+
+def shard_jobs(jobs, shard, shards):
+    """
+
+    Select one shard of a sweep, so the sweep can be split across
+    machines. Jobs sharing an environment, ant_type and site radius stay
+    in the same shard, and these groups are dealt round-robin in sorted
+    order, so every shard gets a similar spread of radii.
+
+    Parameters
+    ----------
+    jobs : list of SweepJobs
+        All jobs of the sweep.
+    shard : int
+        Shard to select, from 1 to `shards`.
+    shards : int
+        Number of shards.
+
+    Returns
+    -------
+    jobs : list of SweepJobs
+        Sorted jobs of the shard.
+
+    """
+    if not 1 <= shard <= shards:
+        raise ValueError('Shard must be between 1 and {}: {}'.format(
+            shards, shard))
+
+    groups = sorted(set(
+        (job.environment, job.ant_type, job.site_radius) for job in jobs))
+
+    selected = set(groups[shard - 1::shards])
+
+    return sorted(
+        job for job in set(jobs)
+        if (job.environment, job.ant_type, job.site_radius) in selected
+    )
+
+
+def merge_lut_files(paths, output_path):
+    """
+
+    Merge lookup tables written by separate shards of a sweep into one
+    table, in the same row order as an unsharded sweep.
+
+    Parameters
+    ----------
+    paths : list of strings
+        Paths of the shard lookup tables.
+    output_path : string
+        Path of the merged lookup table.
+
+    Returns
+    -------
+    rows : int
+        Number of rows written.
+
+    """
+    rows = []
+    seen = {}
+
+    for path in paths:
+        with open(path, newline='') as lut_file:
+            reader = csv.reader(lut_file)
+            header = tuple(next(reader))
+            if header != LUT_HEADER:
+                raise ValueError('Not a capacity lookup table: {}'.format(path))
+
+            for row in reader:
+                key = _lut_row_key(row)
+                if (key, row[0]) in seen:
+                    raise ValueError(
+                        'Job {} is in both {} and {}'.format(
+                            key, seen[(key, row[0])], path))
+                seen[(key, row[0])] = path
+                rows.append((key, row))
+
+    # stable, so confidence intervals keep their order within each job
+    rows.sort(key=lambda item: item[0])
+
+    with LutWriter(output_path) as lut_writer:
+        lut_writer.write([row for key, row in rows])
+
+    return len(rows)
+
+
+def _lut_row_key(row):
+    """
+    SweepJob of a lookup table row, as parsed from the .csv file.
+    """
+    columns = dict(zip(LUT_HEADER, row))
+
+    return SweepJob(
+        columns['environment'],
+        columns['ant_type'],
+        _parse_number(columns['inter_site_distance_m']) / 2,
+        _parse_number(columns['frequency_GHz']),
+        _parse_number(columns['bandwidth_MHz']),
+        columns['generation'],
+        columns['transmission_type'],
+    )
+
+
+def _parse_number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def generate_template_receivers(template, site_radius, parameters, rng=None):
+    """
+
+    Generate grid receivers by scaling the cached unit receiver grid of
+    a site layout template.
+
+    Parameters
+    ----------
+    template : SiteLayoutTemplate
+        Unit site layout, including the grid receiver positions.
+    site_radius : int
+        Radius of site area in meters.
+    parameters : dict
+        Contains all necessary simulation parameters.
+    rng : numpy.random.Generator, optional
+        Random stream for the indoor flags. Defaults to the global
+        numpy random state.
+
+    Output
+    ------
+    receivers : ReceiverSet
+        Contains the grid receivers within the site area.
+
+    """
+    random_state = np.random if rng is None else rng
+
+    indoor_outdoor_probability = random_state.random(len(template.receiver_mask))
+
+    indoor = (indoor_outdoor_probability < 0.5)[template.receiver_mask]
+
+    receivers = ReceiverSet(
+        template.receiver_coordinates(site_radius),
+        ue_height=float(parameters['rx_height']),
+        gain=parameters['rx_gain'],
+        losses=parameters['rx_losses'],
+        misc_losses=parameters['rx_misc_losses'],
+        indoor=indoor,
+    )
+
+    return receivers
+
+
+def simulate_site_radius(template, environment, ant_type, site_radius, bands,
+    parameters, modulation_and_coding_lut, confidence_intervals,
+    full_results_writer=None, return_results=False, timings=None):
+    """
+
+    Simulate every band for one environment, ant_type and site radius,
+    sharing the geometry between bands.
+
+    The indoor flags are drawn from a stream seeded by the environment,
+    ant_type and site radius, so results do not depend on which worker
+    runs the job or in what order.
+
+    Parameters
+    ----------
+    template : SiteLayoutTemplate
+        Unit site layout.
+    environment : string
+        Either urban, suburban or rural clutter type.
+    ant_type : string
+        Type of transmitters modelled.
+    site_radius : int
+        Radius of site area in meters.
+    bands : list of tuples
+        Bands as (frequency, bandwidth, generation, transmission_type).
+    parameters : dict
+        Contains all necessary simulation parameters.
+    modulation_and_coding_lut : dict
+        Lookup tables for spectral efficiency by generation.
+    confidence_intervals : list of ints
+        Confidence intervals to report.
+    full_results_writer : callable, optional
+        Called with (results, job) for each band, e.g. to write the full
+        results table. Must be picklable when used with several workers.
+    return_results : bool
+        If True, return the full results of each band as well.
+    timings : StageTimings, optional
+        Records the time spent in each stage, from the site layout to
+        the lookup table rows.
+
+    Returns
+    -------
+    output : list of tuples
+        (job, lookup table rows, results) for each band, where results
+        is None unless `return_results` is True.
+
+    """
+    rng = generate_stream(
+        parameters['seed_value1_{}'.format(environment)],
+        'receivers', ant_type, site_radius)
+
+    with timed(timings, 'site_layout'):
+        transmitter, interfering_transmitters, site_area, int_site_areas = \
+            template.sites_and_site_areas(site_radius)
+
+    with timed(timings, 'receivers'):
+        receivers = generate_template_receivers(template, site_radius,
+            parameters, rng)
+
+    manager = SimulationManager(
+        transmitter, interfering_transmitters, ant_type,
+        receivers, site_area, parameters, timings
+        )
+
+    band_results = manager.estimate_link_budget_multiband(
+        bands,
+        ant_type,
+        environment,
+        modulation_and_coding_lut,
+        parameters
+        )
+
+    output = []
+
+    for band, results in band_results.items():
+
+        job = SweepJob(environment, ant_type, site_radius, *band)
+
+        if full_results_writer is not None:
+            with timed(timings, 'full_results'):
+                full_results_writer(results, job)
+
+        with timed(timings, 'percentiles'):
+            aggregator = PercentileAggregator(confidence_intervals, exact=True)
+            aggregator.update(results)
+
+            rows = lut_rows(
+                aggregator.percentile_values(job.transmission_type),
+                environment, site_radius, job.frequency, job.bandwidth,
+                job.generation, ant_type, job.transmission_type, parameters
+            )
+
+        output.append((job, rows, results if return_results else None))
+
+    return output
+
+
+class SweepProgress(object):
+    """
+
+    Reports the number of completed jobs, throughput and estimated time
+    remaining at most once per `interval` seconds.
+
+    """
+    def __init__(self, total, interval=10, completed=0):
+        self.total = total
+        self.interval = interval
+        self.completed = completed
+        self.initial = completed
+        self.start = time.time()
+        self.last_report = self.start
+
+
+    def update(self, jobs):
+        """
+
+        Record completed jobs, and report if the interval has elapsed or
+        the sweep is finished.
+
+        """
+        self.completed += jobs
+
+        now = time.time()
+        if now - self.last_report >= self.interval or self.completed >= self.total:
+            self.last_report = now
+            print(self.summary())
+
+
+    @property
+    def rate(self):
+        elapsed = time.time() - self.start
+        if elapsed <= 0:
+            return 0
+        return (self.completed - self.initial) / elapsed
+
+
+    @property
+    def eta(self):
+        if self.rate == 0:
+            return np.inf
+        return (self.total - self.completed) / self.rate
+
+
+    def summary(self):
+        return '--{}/{} jobs, {:.2f} jobs/s, ETA {}'.format(
+            self.completed, self.total, self.rate, _format_seconds(self.eta))
+
+
+def _format_seconds(seconds):
+    if not np.isfinite(seconds):
+        return 'unknown'
+
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+
+
+class SweepRunner(object):
+    """
+
+    Run a sweep across a process pool.
+
+    Jobs sharing an environment, ant_type and site radius are run as one
+    task, so all of their bands are evaluated in one pass over the same
+    geometry. Results are streamed back as tasks finish and written to
+    the lookup table in sorted job order through a `LutWriter`.
+
+    Parameters
+    ----------
+    template : SiteLayoutTemplate
+        Unit site layout.
+    parameters : dict
+        Contains all necessary simulation parameters.
+    modulation_and_coding_lut : dict
+        Lookup tables for spectral efficiency by generation.
+    confidence_intervals : list of ints
+        Confidence intervals to report.
+    workers : int
+        Number of worker processes. With 1, jobs run in this process.
+    full_results_writer : callable, optional
+        Called with (results, job) for each job. Writers are called in
+        the worker that ran the job, unless they have a `parallel_safe`
+        attribute set to False, in which case the results are sent back
+        and written by this process.
+    report_interval : float
+        Seconds between progress reports.
+    background_writes : bool
+        If True, the lookup table is written on a background thread.
+    timings_path : string, optional
+        If given, the time spent in each stage of each task (the jobs of
+        one site radius) is appended to this .jsonl file, and the totals
+        are kept in `timings`. Stages are not timed otherwise.
+
+    """
+    def __init__(self, template, parameters, modulation_and_coding_lut,
+        confidence_intervals, workers=1, full_results_writer=None,
+        report_interval=10, background_writes=True, timings_path=None):
+
+        self.template = template
+        self.parameters = parameters
+        self.modulation_and_coding_lut = modulation_and_coding_lut
+        self.confidence_intervals = confidence_intervals
+        self.workers = workers
+        self.full_results_writer = full_results_writer
+        self.report_interval = report_interval
+        self.background_writes = background_writes
+        self.timings_path = timings_path
+        self.timings = StageTimings() if timings_path is not None else None
+
+
+    def run(self, jobs, directory, filename='capacity_lut_by_frequency.csv',
+        manifest=None):
+        """
+
+        Run the jobs and write the capacity lookup table.
+
+        Parameters
+        ----------
+        jobs : list of SweepJobs
+            Jobs to run.
+        directory : string
+            Folder the lookup table will be written to.
+        filename : string
+            Name of the .csv file.
+        manifest : SweepManifest, optional
+            Record of completed jobs. Jobs already in the manifest are
+            skipped and their recorded rows reused, and each job is
+            recorded as soon as it finishes.
+
+        Returns
+        -------
+        path : string
+            Path of the lookup table.
+
+        """
+        order = sorted(set(jobs))
+
+        ready = {}
+
+        path = os.path.join(directory, filename)
+
+        # rows are written in sorted job order as soon as every earlier
+        # job has finished, holding only out of order jobs in memory
+        with LutWriter(path, background=self.background_writes) as lut_writer:
+
+            written = 0
+
+            for finished in self.completed(order, manifest):
+                ready.update(finished)
+                written = self._write_ready(order, ready, written, lut_writer)
+
+        if self.timings is not None:
+            print(self.timings.summary())
+
+        return path
+
+
+    def completed(self, jobs, manifest=None):
+        """
+
+        Run the jobs, yielding a list of (job, rows) for each task as it
+        finishes.
+
+        Parameters
+        ----------
+        jobs : list of SweepJobs
+            Jobs to run.
+        manifest : SweepManifest, optional
+            Record of completed jobs. Jobs already in the manifest are
+            yielded first without running, and each new job is recorded
+            as soon as it finishes.
+
+        """
+        ready = []
+        pending = []
+
+        for job in sorted(set(jobs)):
+            if manifest is not None and self.job_key(job) in manifest:
+                ready.append((job, manifest.rows(self.job_key(job))))
+            else:
+                pending.append(job)
+
+        if ready:
+            print('--skipping {} completed jobs'.format(len(ready)))
+            yield ready
+
+        progress = SweepProgress(len(ready) + len(pending),
+            self.report_interval, len(ready))
+
+        for task_output, timings in self.execute(pending):
+            if timings is not None:
+                self._record_timings(task_output, timings)
+
+            finished = []
+            for job, job_rows, results in task_output:
+                if results is not None:
+                    self.full_results_writer(results, job)
+                if manifest is not None:
+                    manifest.record(self.job_key(job), job, job_rows)
+                finished.append((job, job_rows))
+            progress.update(len(finished))
+
+            yield finished
+
+
+    def run_adaptive(self, environments, ant_types, spectrum_portfolio,
+        start, stop, directory, filename='capacity_lut_by_frequency.csv',
+        manifest=None, coarse_step=1000, min_step=50, tolerances=None,
+        max_site_radius=None, max_rounds=None):
+        """
+
+        Run a sweep that adaptively refines the site radii.
+
+        Radii start on a coarse grid, and each interval between simulated
+        radii is bisected while any band's value of a `tolerances` column,
+        at any confidence interval, changes across it by more than the
+        tolerance. Radii stay on the grid of range(start, stop, min_step),
+        so they match (and reuse manifest entries of) a fixed sweep.
+
+        The simulated radii and the interpolation check are written next to
+        the lookup table as {filename}_refinement.json. The check drops each
+        interior radius in turn and interpolates it linearly from its
+        neighbours, a conservative estimate of the error of interpolating
+        between the radii kept.
+
+        Parameters
+        ----------
+        environments : list of strings
+            Environments to simulate.
+        ant_types : list of strings
+            Types of transmitters to simulate.
+        spectrum_portfolio : list of tuples
+            Bands as (frequency, bandwidth, generation, transmission_type).
+        start, stop : int
+            Range of site radii in metres, as for range().
+        directory : string
+            Folder the lookup table will be written to.
+        filename : string
+            Name of the .csv file.
+        manifest : SweepManifest, optional
+            Record of completed jobs, as for `run`.
+        coarse_step : int
+            Spacing of the initial radii, a multiple of `min_step`.
+        min_step : int
+            Smallest spacing between radii.
+        tolerances : dict, optional
+            Largest change allowed across an interval, by lookup table
+            column. Defaults to REFINEMENT_TOLERANCES.
+        max_site_radius : dict, optional
+            Largest site radius to simulate in each environment.
+        max_rounds : int, optional
+            Most rounds of simulation, including the coarse grid.
+
+        Returns
+        -------
+        path : string
+            Path of the lookup table.
+
+        """
+        if coarse_step % min_step:
+            raise ValueError('coarse_step must be a multiple of min_step: '
+                '{} and {}'.format(coarse_step, min_step))
+
+        tolerances = tolerances or REFINEMENT_TOLERANCES
+        max_site_radius = max_site_radius or {}
+
+        new_radii = OrderedDict()
+        for environment in environments:
+            for ant_type in ant_types:
+                radii = [
+                    site_radius for site_radius in range(start, stop, min_step)
+                    if site_radius <= max_site_radius.get(environment, np.inf)
+                ]
+                if not radii:
+                    continue
+                coarse = radii[::coarse_step // min_step]
+                if coarse[-1] != radii[-1]:
+                    coarse.append(radii[-1])
+                new_radii[(environment, ant_type)] = coarse
+
+        site_radii = OrderedDict((key, []) for key in new_radii)
+        rows = {}
+        rounds = 0
+
+        while new_radii:
+            jobs = [
+                SweepJob(environment, ant_type, site_radius, *band)
+                for (environment, ant_type), radii in new_radii.items()
+                for site_radius in radii
+                for band in spectrum_portfolio
+            ]
+            print('--refinement round {}: {} site radii'.format(rounds + 1,
+                sum(len(radii) for radii in new_radii.values())))
+
+            for finished in self.completed(jobs, manifest):
+                rows.update(finished)
+
+            for key, radii in new_radii.items():
+                site_radii[key] = sorted(site_radii[key] + radii)
+
+            rounds += 1
+            if max_rounds is not None and rounds >= max_rounds:
+                break
+
+            new_radii = OrderedDict()
+            for (environment, ant_type), radii in site_radii.items():
+                midpoints = []
+                for lower, upper in zip(radii[:-1], radii[1:]):
+                    steps = (upper - lower) // min_step
+                    if steps < 2:
+                        continue
+                    for band in spectrum_portfolio:
+                        if _exceeds_tolerances(
+                            rows[SweepJob(environment, ant_type, lower, *band)],
+                            rows[SweepJob(environment, ant_type, upper, *band)],
+                            tolerances):
+                            midpoints.append(lower + steps // 2 * min_step)
+                            break
+                if midpoints:
+                    new_radii[(environment, ant_type)] = midpoints
+
+        path = os.path.join(directory, filename)
+
+        with LutWriter(path, background=self.background_writes) as lut_writer:
+            for job in sorted(rows):
+                lut_writer.write(rows[job])
+
+        errors = interpolation_errors(rows, site_radii, spectrum_portfolio,
+            list(tolerances))
+
+        report = OrderedDict([
+            ('lut', filename),
+            ('start', start),
+            ('stop', stop),
+            ('coarse_step', coarse_step),
+            ('min_step', min_step),
+            ('tolerances', tolerances),
+            ('rounds', rounds),
+            ('site_radii', _nest(site_radii)),
+            ('interpolation_error', _nest(errors)),
+        ])
+
+        stem, extension = os.path.splitext(path)
+        with open('{}_refinement.json'.format(stem), 'w') as report_file:
+            json.dump(report, report_file, indent=4)
+
+        if self.timings is not None:
+            print(self.timings.summary())
+
+        for (environment, ant_type), radii in site_radii.items():
+            print('--{} {}: simulated {} site radii, interpolation error {}'.format(
+                environment, ant_type, len(radii), ', '.join(
+                    '{} {:.3g}'.format(column, error) for column, error in
+                    errors[(environment, ant_type)].items())))
+
+        return path
+
+
+    def _record_timings(self, task_output, timings):
+        job = task_output[0][0]
+
+        record = OrderedDict([
+            ('environment', job.environment),
+            ('ant_type', job.ant_type),
+            ('site_radius', job.site_radius),
+            ('bands', [job.band for job, job_rows, results in task_output]),
+            ('timings', timings),
+        ])
+
+        with open(self.timings_path, 'a') as timings_file:
+            timings_file.write(json.dumps(record, default=_json_default) + '\n')
+
+        self.timings.update(timings)
+
+
+    def _write_ready(self, order, ready, written, lut_writer):
+        while written < len(order) and order[written] in ready:
+            lut_writer.write(ready.pop(order[written]))
+            written += 1
+
+        return written
+
+
+    def job_key(self, job):
+        """
+
+        Key identifying a job together with every input that affects its
+        rows, so changing any of them invalidates recorded results.
+
+        """
+        return job_key(job, self.parameters, self.modulation_and_coding_lut,
+            self.confidence_intervals, self.template.origin,
+            len(self.template.receiver_mask), len(self.template.interferers))
+
+
+    def execute(self, jobs):
+        """
+
+        Run the jobs, yielding the output of each task as it finishes,
+        with its stage timings as a dict if `timings_path` was given, or
+        None.
+
+        """
+        tasks = OrderedDict()
+        for job in jobs:
+            key = (job.environment, job.ant_type, job.site_radius)
+            tasks.setdefault(key, []).append(job.band)
+
+        writer = self.full_results_writer
+        in_worker = getattr(writer, 'parallel_safe', True)
+
+        context = (self.template, self.parameters,
+            self.modulation_and_coding_lut, self.confidence_intervals,
+            writer if in_worker else None,
+            writer is not None and not in_worker,
+            self.timings_path is not None)
+
+        if self.workers == 1:
+            _init_worker(context)
+            for key, bands in tasks.items():
+                yield _run_task(key, bands)
+            return
+
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker,
+            initargs=(context,)) as executor:
+
+            futures = [
+                executor.submit(_run_task, key, bands)
+                for key, bands in tasks.items()
+            ]
+
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def _exceeds_tolerances(lower_rows, upper_rows, tolerances):
+    """
+    Whether any tolerance column changes by more than its tolerance
+    between the lookup table rows of two site radii.
+    """
+    for lower, upper in zip(lower_rows, upper_rows):
+        for column, tolerance in tolerances.items():
+            index = LUT_HEADER.index(column)
+            if abs(upper[index] - lower[index]) > tolerance:
+                return True
+
+    return False
+
+
+def interpolation_errors(rows, site_radii, spectrum_portfolio, columns):
+    """
+
+    Leave-one-out check of linear interpolation between site radii.
+
+    Each interior radius is interpolated from its two neighbours, and the
+    largest absolute error over bands and confidence intervals is
+    reported for each column.
+
+    Parameters
+    ----------
+    rows : dict
+        Lookup table rows by SweepJob.
+    site_radii : dict
+        Sorted simulated site radii by (environment, ant_type).
+    spectrum_portfolio : list of tuples
+        Bands as (frequency, bandwidth, generation, transmission_type).
+    columns : list of strings
+        Lookup table columns to check.
+
+    Returns
+    -------
+    errors : dict
+        Largest error of each column by (environment, ant_type).
+
+    """
+    indices = [LUT_HEADER.index(column) for column in columns]
+
+    errors = OrderedDict()
+
+    for (environment, ant_type), radii in site_radii.items():
+
+        largest = np.zeros(len(columns))
+
+        if len(radii) >= 3:
+            distances = np.asarray(radii, dtype=float)
+            weights = ((distances[1:-1] - distances[:-2]) /
+                (distances[2:] - distances[:-2]))[:, np.newaxis, np.newaxis]
+
+            for band in spectrum_portfolio:
+                # (radii, confidence intervals, columns)
+                values = np.array([
+                    [[row[index] for index in indices] for row in
+                        rows[SweepJob(environment, ant_type, site_radius, *band)]]
+                    for site_radius in radii
+                ], dtype=float)
+
+                predicted = values[:-2] + weights * (values[2:] - values[:-2])
+                largest = np.fmax(largest,
+                    np.abs(predicted - values[1:-1]).max(axis=(0, 1)))
+
+        errors[(environment, ant_type)] = OrderedDict(
+            zip(columns, largest.tolist()))
+
+    return errors
+
+
+def _nest(values):
+    """
+    Nest a dict keyed by (environment, ant_type) for JSON.
+    """
+    nested = OrderedDict()
+    for (environment, ant_type), value in values.items():
+        nested.setdefault(environment, OrderedDict())[ant_type] = value
+
+    return nested
+
+
+_WORKER_CONTEXT = None
+
+
+def _init_worker(context):
+    """
+    Hold the shared sweep inputs in each worker, so they are sent once
+    per process rather than once per task.
+    """
+    global _WORKER_CONTEXT
+    _WORKER_CONTEXT = context
+
+
+def _run_task(key, bands):
+    (template, parameters, lut, confidence_intervals, writer,
+        return_results, profile) = _WORKER_CONTEXT
+    environment, ant_type, site_radius = key
+
+    timings = StageTimings() if profile else None
+
+    output = simulate_site_radius(template, environment, ant_type,
+        site_radius, bands, parameters, lut, confidence_intervals, writer,
+        return_results, timings)
+
+    return output, timings.to_dict() if profile else None
+
+
+class SweepManifest(object):
+    """
+
+    JSON-lines record of completed sweep jobs and their lookup table rows.
+
+    Each completed job is appended as one line and synced to disk. A line
+    cut short by a crash is discarded when the manifest is next opened, so
+    a job is either fully recorded or run again.
+
+    Parameters
+    ----------
+    path : string
+        Path of the .jsonl manifest.
+
+    """
+    def __init__(self, path):
+
+        self.path = path
+        self.records = OrderedDict()
+
+        if os.path.exists(path):
+            self._load()
+
+
+    def __contains__(self, key):
+        return key in self.records
+
+
+    def __len__(self):
+        return len(self.records)
+
+
+    def rows(self, key):
+        """
+
+        Return the lookup table rows recorded for a job key.
+
+        """
+        return self.records[key]
+
+
+    def record(self, key, job, rows):
+        """
+
+        Append a completed job to the manifest.
+
+        Parameters
+        ----------
+        key : string
+            Job key, see `job_key`.
+        job : SweepJob
+            The completed job.
+        rows : list of tuples
+            Lookup table rows of the job.
+
+        """
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        line = json.dumps({'key': key, 'job': list(job), 'rows': rows},
+            default=_json_default)
+
+        with open(self.path, 'a') as manifest_file:
+            manifest_file.write(line + '\n')
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+
+        self.records[key] = [tuple(row) for row in rows]
+
+
+    def _load(self):
+        with open(self.path, 'rb') as manifest_file:
+            content = manifest_file.read()
+
+        complete = content.rfind(b'\n') + 1
+
+        if complete < len(content):
+            # drop a partial line left by a crash, so the next record
+            # starts on a line of its own
+            with open(self.path, 'r+b') as manifest_file:
+                manifest_file.truncate(complete)
+
+        for line in content[:complete].decode('utf-8').splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self.records[record['key']] = [tuple(row) for row in record['rows']]
+
+
+def job_key(job, *inputs):
+    """
+
+    Hash a sweep job together with the inputs that determine its results
+    (e.g. the simulation parameters).
+
+    Parameters
+    ----------
+    job : SweepJob
+        The job.
+    *inputs : JSON serializable objects
+        Inputs the job results depend on.
+
+    Returns
+    -------
+    key : string
+        Hex digest identifying the job and inputs.
+
+    """
+    payload = json.dumps([list(job)] + list(inputs), sort_keys=True,
+        default=_json_default)
+
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError('{} is not JSON serializable'.format(type(value)))
@@ -11,8 +11,12 @@ from shapely.geometry import shape, Point, LineString
 import numpy as np
 from itertools import tee
 from collections import OrderedDict
+from scipy.spatial import cKDTree
 
-from dice.path_loss import path_loss_calculator
+from dice.path_loss import (path_loss_calculator, free_space_path_loss,
+    generate_shadow_fading, generate_stream)
+from dice.results import LinkBudgetResults
+from dice.profiling import timed
 
 np.random.seed(42)
 
@@ -27,21 +31,23 @@ class SimulationManager(object):
         Contains a geojson dict for the transmitter site.
     interfering_transmitters : list of dicts
         Contains dicts for each interfering transmitter site.
-    receivers : list of dicts
-        Contains a dict for each User Equipment (UE) receiver.
+    receivers : ReceiverSet or list of dicts
+        All User Equipment (UE) receivers, either as a `ReceiverSet` or
+        as a geojson dict for each receiver.
     site_area : list of dicts
         Contains geojson dict for the site area polygon.
     simulation_parameters : dict
         A dict containing all simulation parameters necessary.
+    timings : StageTimings, optional
+        Records the time spent in each link budget stage.
 
     """
     def __init__(self, transmitter, interfering_transmitters, ant_type,
-        receivers, site_area, simulation_parameters):
+        receivers, site_area, simulation_parameters, timings=None):
 
         self.transmitter = Transmitter(transmitter[0], ant_type,
             simulation_parameters)
         self.interfering_transmitters = {}
-        self.receivers = {}
         self.site_area = SiteArea(site_area[0])
 
         for interfering_transmitter in interfering_transmitters:
@@ -51,15 +57,28 @@ class SimulationManager(object):
                 )
             self.interfering_transmitters[site_id] = site_object
 
-        for receiver in receivers:
-            receiver_id = receiver['properties']["ue_id"]
-            receiver = Receiver(receiver, simulation_parameters)
-            self.receivers[receiver_id] = receiver
+        if isinstance(receivers, ReceiverSet):
+            self.receivers = receivers
+        else:
+            self.receivers = ReceiverSet.from_geojson(receivers)
+
+        self.timings = timings
+
+
+    def stage(self, name):
+        """
+
+        Context for timing a link budget stage, doing nothing unless
+        `timings` were given.
+
+        """
+        return timed(self.timings, name)
 
 
     def estimate_link_budget(self, frequency, bandwidth,
         generation, ant_type, tranmission_type, environment,
-        modulation_and_coding_lut, simulation_parameters):
+        modulation_and_coding_lut, simulation_parameters,
+        k_interferers=None):
         """
 
         Takes propagation parameters and calculates link budget capacity.
@@ -83,70 +102,527 @@ class SimulationManager(object):
             spectral efficiencies and SINR estimates.
         simulation_parameters : dict
             A dict containing all simulation parameters necessary.
+        k_interferers : int, optional
+            Number of nearest interferers to consider per receiver. All
+            interferers are used by default.
 
         Returns
         -------
-        results : List of dicts
-            Each dict is an individual simulation result.
+        results : LinkBudgetResults
+            Columnar simulation results, one row per receiver. Iterating
+            (or calling `to_dicts`) gives one dict per receiver.
 
         """
-        results = []
+        band = (frequency, bandwidth, generation, tranmission_type)
+
+        results = self.estimate_link_budget_multiband([band], ant_type,
+            environment, modulation_and_coding_lut, simulation_parameters,
+            k_interferers
+        )
+
+        return results[band]
+
+
+    def estimate_link_budget_multiband(self, spectrum_portfolio, ant_type,
+        environment, modulation_and_coding_lut, simulation_parameters,
+        k_interferers=None):
+        """
+
+        Calculate link budget capacity for several spectrum bands in a
+        single pass.
+
+        The receiver-transmitter geometry is computed once and every
+        stage is broadcast over the band axis, so each additional band
+        costs little more than its spectral efficiency mapping.
+
+        Parameters
+        ----------
+        spectrum_portfolio : list of tuples
+            Each band as (frequency, bandwidth, generation,
+            transmission_type).
+        ant_type : str
+            Type of antenna (macro, small etc.).
+        environment : string
+            Either urban, suburban or rural.
+        modulation_and_coding_lut : list of tuples
+            A lookup table containing modulation and coding rates,
+            spectral efficiencies and SINR estimates.
+        simulation_parameters : dict
+            A dict containing all simulation parameters necessary.
+        k_interferers : int, optional
+            Number of nearest interferers to consider per receiver. All
+            interferers are used by default.
+
+        Returns
+        -------
+        results : OrderedDict
+            `LinkBudgetResults` for each band, keyed by the band tuple.
+
+        """
+        receivers = self.receivers
+
+        batches = self.estimate_link_budget_bands(
+            receivers.coordinates,
+            self.transmitter_coordinates(),
+            self.interfering_transmitter_coordinates(),
+            [band[:3] for band in spectrum_portfolio],
+            environment,
+            modulation_and_coding_lut,
+            simulation_parameters,
+            receiver_gain=receivers.gain,
+            receiver_losses=receivers.losses,
+            receiver_misc_losses=receivers.misc_losses,
+            k_interferers=k_interferers,
+        )
+
+        results = OrderedDict()
+
+        for band, batch in zip(spectrum_portfolio, batches):
+            results[tuple(band)] = LinkBudgetResults(OrderedDict([
+                ('id', receivers.ids),
+                ('path_loss', batch['path_loss']),
+                ('r_model', batch['r_model']),
+                ('ave_inf_pl', batch['ave_inf_pl']),
+                ('received_power', batch['received_power']),
+                ('distance', batch['distance']),
+                ('interference', batch['interference']),
+                ('i_model', batch['i_model']),
+                ('network_load', simulation_parameters['network_load']),
+                ('ave_distance', batch['ave_distance']),
+                ('noise', batch['noise']),
+                ('i_plus_n', batch['i_plus_n']),
+                ('tranmission_type', band[3]),
+                ('sinr', batch['sinr']),
+                ('spectral_efficiency', batch['spectral_efficiency']),
+                ('capacity_mbps', batch['capacity_mbps']),
+                ('capacity_mbps_km2', batch['capacity_mbps_km2']),
+                ('receiver_x', batch['receiver_x']),
+                ('receiver_y', batch['receiver_y']),
+            ]))
+
+        return results
+
+
+    def estimate_link_budget_batch(self, receiver_coordinates,
+        transmitter_coordinates, interferer_coordinates, frequency,
+        bandwidth, generation, environment, modulation_and_coding_lut,
+        simulation_parameters, receiver_gain=0, receiver_losses=0,
+        receiver_misc_losses=0, k_interferers=None):
+        """
+
+        Vectorized link budget for a batch of receivers.
+
+        Every stage of `estimate_link_budget` is evaluated as an array
+        operation over all receivers (N) and transmitters (M) at once,
+        giving the same values as the per-receiver path.
+
+        Parameters
+        ----------
+        receiver_coordinates : array_like
+            (N, 2) array of receiver x and y coordinates.
+        transmitter_coordinates : array_like
+            (M, 2) array of serving transmitter coordinates. Each receiver
+            is served by its closest transmitter.
+        interferer_coordinates : array_like
+            (M, 2) array of interfering transmitter coordinates.
+        frequency : float
+            The carrier frequency for the chosen spectrum band (GHz).
+        bandwidth : int
+            The bandwidth of the carrier frequency (MHz).
+        generation : string
+            The technology generation type.
+        environment : string
+            Either urban, suburban or rural.
+        modulation_and_coding_lut : list of tuples
+            A lookup table containing modulation and coding rates,
+            spectral efficiencies and SINR estimates.
+        simulation_parameters : dict
+            A dict containing all simulation parameters necessary.
+        receiver_gain : float or array_like
+            Receiver antenna gain, either a scalar or one value per receiver.
+        receiver_losses : float or array_like
+            Receiver losses, either a scalar or one value per receiver.
+        receiver_misc_losses : float or array_like
+            Receiver miscellaneous losses, either a scalar or one value
+            per receiver.
+        k_interferers : int, optional
+            Number of nearest interferers to consider per receiver. All
+            interferers are used by default.
+
+        Returns
+        -------
+        results : dict
+            Each metric as a length N array, with the model names and
+            noise as scalars.
+
+        """
+        return self.estimate_link_budget_bands(receiver_coordinates,
+            transmitter_coordinates, interferer_coordinates,
+            [(frequency, bandwidth, generation)], environment,
+            modulation_and_coding_lut, simulation_parameters,
+            receiver_gain, receiver_losses, receiver_misc_losses,
+            k_interferers
+        )[0]
+
+
+    def estimate_link_budget_bands(self, receiver_coordinates,
+        transmitter_coordinates, interferer_coordinates, bands, environment,
+        modulation_and_coding_lut, simulation_parameters, receiver_gain=0,
+        receiver_losses=0, receiver_misc_losses=0, k_interferers=None):
+        """
+
+        Vectorized link budget for a batch of receivers and several bands.
 
-        for receiver in self.receivers.values():
+        Distances are computed once and shared by all bands. Path loss,
+        received power, interference and SINR are evaluated with a
+        leading band axis (B).
 
-            path_loss, r_model, r_distance = self.estimate_path_loss(
-                receiver, frequency, environment, simulation_parameters, generation
+        Parameters
+        ----------
+        receiver_coordinates : array_like
+            (N, 2) array of receiver x and y coordinates.
+        transmitter_coordinates : array_like
+            (M, 2) array of serving transmitter coordinates.
+        interferer_coordinates : array_like
+            (M, 2) array of interfering transmitter coordinates.
+        bands : list of tuples
+            Each band as (frequency, bandwidth, generation).
+        environment : string
+            Either urban, suburban or rural.
+        modulation_and_coding_lut : list of tuples
+            A lookup table containing modulation and coding rates,
+            spectral efficiencies and SINR estimates.
+        simulation_parameters : dict
+            A dict containing all simulation parameters necessary.
+        receiver_gain : float or array_like
+            Receiver antenna gain, either a scalar or one value per receiver.
+        receiver_losses : float or array_like
+            Receiver losses, either a scalar or one value per receiver.
+        receiver_misc_losses : float or array_like
+            Receiver miscellaneous losses, either a scalar or one value
+            per receiver.
+        k_interferers : int, optional
+            Number of nearest interferers to consider per receiver. All
+            interferers are used by default.
+
+        Returns
+        -------
+        results : list of dicts
+            One dict of metrics per band, as returned by
+            `estimate_link_budget_batch`.
+
+        """
+        receiver_coordinates = np.asarray(
+            receiver_coordinates, dtype=float).reshape(-1, 2)
+
+        frequency = np.array([band[0] for band in bands], dtype=float)
+        bandwidth = np.array([band[1] for band in bands], dtype=float)
+
+        if self.timings is not None:
+            self.timings.receivers += len(receiver_coordinates) * len(bands)
+
+        with self.stage('distance'):
+            r_distance, interferer_distance = self.estimate_distances_batch(
+                receiver_coordinates, transmitter_coordinates,
+                interferer_coordinates, k_interferers
             )
 
-            received_power = self.estimate_received_power(self.transmitter,
-                receiver, path_loss
+        with self.stage('path_loss'):
+            path_loss, r_model = self.estimate_path_loss_batch(
+                r_distance, frequency[:, np.newaxis], simulation_parameters
             )
 
-            interference, i_model, ave_distance, ave_inf_pl = self.estimate_interference(
-                receiver, frequency, environment, simulation_parameters, generation)
+        with self.stage('received_power'):
+            received_power = self.estimate_received_power_batch(path_loss,
+                receiver_gain, receiver_losses, receiver_misc_losses
+            )
 
+        with self.stage('interference'):
+            interference, i_model, ave_distance, ave_inf_pl = \
+                self.estimate_interference_batch(interferer_distance,
+                frequency[:, np.newaxis, np.newaxis], simulation_parameters,
+                receiver_gain, receiver_losses, receiver_misc_losses
+                )
+
+        with self.stage('noise'):
             noise = self.estimate_noise(
-                bandwidth
+                bandwidth[:, np.newaxis]
             )
 
+        with self.stage('sinr'):
             f_received_power, f_interference, f_noise, i_plus_n, sinr = \
-                self.estimate_sinr(received_power, interference, noise,
+                self.estimate_sinr_batch(received_power, interference, noise,
                 simulation_parameters
                 )
 
-            spectral_efficiency = self.estimate_spectral_efficiency(
-                sinr, generation, modulation_and_coding_lut
-            )
+        with self.stage('spectral_efficiency'):
+            spectral_efficiency = np.empty_like(sinr)
+            for idx, band in enumerate(bands):
+                spectral_efficiency[idx] = \
+                    self.estimate_spectral_efficiency_batch(
+                    sinr[idx], band[2], modulation_and_coding_lut
+                )
 
+        with self.stage('capacity'):
             capacity_mbps, capacity_mbps_km2 = (
                 self.estimate_average_capacity(
-                bandwidth, spectral_efficiency)
+                bandwidth[:, np.newaxis], spectral_efficiency)
             )
 
+        interference = np.log10(f_interference)
+        i_plus_n = np.log10(i_plus_n)
+        receiver_x = np.ascontiguousarray(receiver_coordinates[:, 0])
+        receiver_y = np.ascontiguousarray(receiver_coordinates[:, 1])
+
+        results = []
+
+        for idx in range(len(bands)):
             results.append({
-                'id': receiver.id,
-                'path_loss': path_loss,
+                'path_loss': path_loss[idx],
                 'r_model': r_model,
-                # 'type_of_sight': type_of_sight,
-                'ave_inf_pl': ave_inf_pl,
-                'received_power': f_received_power,
+                'ave_inf_pl': ave_inf_pl[idx],
+                'received_power': f_received_power[idx],
                 'distance': r_distance,
-                'interference': np.log10(f_interference),
+                'interference': interference[idx],
                 'i_model': i_model,
-                'network_load': simulation_parameters['network_load'],
                 'ave_distance': ave_distance,
-                'noise': f_noise,
+                'noise': f_noise[idx, 0],
+                'i_plus_n': i_plus_n[idx],
+                'sinr': sinr[idx],
+                'spectral_efficiency': spectral_efficiency[idx],
+                'capacity_mbps': capacity_mbps[idx],
+                'capacity_mbps_km2': capacity_mbps_km2[idx],
+                'receiver_x': receiver_x,
+                'receiver_y': receiver_y,
+            })
+
+        return results
+
+
+    def estimate_link_budget_monte_carlo(self, frequency, bandwidth,
+        generation, ant_type, tranmission_type, environment,
+        modulation_and_coding_lut, simulation_parameters, iterations=None,
+        chunk_size=100, aggregate=True, k_interferers=None):
+        """
+
+        Monte Carlo link budget with independent shadow fading draws.
+
+        For each chunk of iterations, a (iterations x receivers x
+        interferers) shadow fading tensor is drawn in one vectorized call
+        and every link budget stage is evaluated with a leading iteration
+        axis. Memory is bounded by `chunk_size`, and results do not
+        depend on it.
+
+        The serving and interfering links draw from separate streams,
+        created by `generate_stream` from the `seed_value1_*` and
+        `seed_value2_*` simulation parameters for the generation and
+        environment, and the frequency.
+
+        Parameters
+        ----------
+        frequency : float
+            The carrier frequency for the chosen spectrum band (GHz).
+        bandwidth : int
+            The bandwidth of the carrier frequency (MHz).
+        generation : string
+            The technology generation type.
+        ant_type : str
+            Type of antenna (macro, small etc.).
+        tranmission_type : string
+            Transmission type (SISO, MIMO etc.).
+        environment : string
+            Either urban, suburban or rural.
+        modulation_and_coding_lut : list of tuples
+            A lookup table containing modulation and coding rates,
+            spectral efficiencies and SINR estimates.
+        simulation_parameters : dict
+            A dict containing all simulation parameters necessary.
+        iterations : int, optional
+            Number of Monte Carlo iterations. Defaults to
+            `simulation_parameters['iterations']`.
+        chunk_size : int
+            Number of iterations evaluated at once.
+        aggregate : bool
+            If True, return the mean of each metric over all iterations
+            for every receiver. If False, return one row per iteration
+            and receiver, with an `iteration` column.
+        k_interferers : int, optional
+            Number of nearest interferers to consider per receiver. All
+            interferers are used by default.
+
+        Returns
+        -------
+        results : LinkBudgetResults
+            Aggregated or per-iteration simulation results.
+
+        """
+        if iterations is None:
+            iterations = simulation_parameters['iterations']
+
+        receivers = self.receivers
+
+        with self.stage('distance'):
+            r_distance, interferer_distance = self.estimate_distances_batch(
+                receivers.coordinates,
+                self.transmitter_coordinates(),
+                self.interfering_transmitter_coordinates(),
+                k_interferers
+            )
+
+        serving_rng = generate_stream(
+            simulation_parameters['seed_value1_{}'.format(generation)],
+            simulation_parameters['seed_value1_{}'.format(environment)],
+            frequency
+        )
+        interferer_rng = generate_stream(
+            simulation_parameters['seed_value2_{}'.format(generation)],
+            simulation_parameters['seed_value2_{}'.format(environment)],
+            frequency
+        )
+
+        metrics = [
+            'path_loss', 'ave_inf_pl', 'received_power', 'interference',
+            'i_plus_n', 'sinr', 'spectral_efficiency', 'capacity_mbps',
+            'capacity_mbps_km2',
+        ]
+
+        chunks = OrderedDict((metric, []) for metric in metrics)
+
+        for start in range(0, iterations, chunk_size):
+
+            count = min(chunk_size, iterations - start)
+
+            if self.timings is not None:
+                self.timings.receivers += len(receivers) * count
+
+            with self.stage('shadow_fading'):
+                serving_fading = generate_shadow_fading(
+                    serving_rng, (count,) + r_distance.shape)
+                interferer_fading = generate_shadow_fading(
+                    interferer_rng, (count,) + interferer_distance.shape)
+
+            with self.stage('path_loss'):
+                path_loss, r_model = self.estimate_path_loss_batch(
+                    r_distance, frequency, simulation_parameters,
+                    shadow_fading=serving_fading
+                )
+
+            with self.stage('received_power'):
+                received_power = self.estimate_received_power_batch(
+                    path_loss, receivers.gain, receivers.losses,
+                    receivers.misc_losses
+                )
+
+            with self.stage('interference'):
+                interference, i_model, ave_distance, ave_inf_pl = \
+                    self.estimate_interference_batch(interferer_distance,
+                    frequency, simulation_parameters, receivers.gain,
+                    receivers.losses, receivers.misc_losses,
+                    shadow_fading=interferer_fading
+                    )
+
+            with self.stage('noise'):
+                noise = self.estimate_noise(
+                    bandwidth
+                )
+
+            with self.stage('sinr'):
+                f_received_power, f_interference, f_noise, i_plus_n, sinr = \
+                    self.estimate_sinr_batch(received_power, interference,
+                    noise, simulation_parameters
+                    )
+
+            with self.stage('spectral_efficiency'):
+                spectral_efficiency = self.estimate_spectral_efficiency_batch(
+                    sinr, generation, modulation_and_coding_lut
+                )
+
+            with self.stage('capacity'):
+                capacity_mbps, capacity_mbps_km2 = (
+                    self.estimate_average_capacity(
+                    bandwidth, spectral_efficiency)
+                )
+
+            chunk = {
+                'path_loss': path_loss,
+                'ave_inf_pl': ave_inf_pl,
+                'received_power': f_received_power,
+                'interference': np.log10(f_interference),
                 'i_plus_n': np.log10(i_plus_n),
-                'tranmission_type': tranmission_type,
                 'sinr': sinr,
                 'spectral_efficiency': spectral_efficiency,
                 'capacity_mbps': capacity_mbps,
                 'capacity_mbps_km2': capacity_mbps_km2,
-                'receiver_x': receiver.coordinates[0],
-                'receiver_y': receiver.coordinates[1],
-                })
+            }
+
+            for metric in metrics:
+                if aggregate:
+                    chunks[metric].append(chunk[metric].sum(axis=0))
+                else:
+                    chunks[metric].append(chunk[metric])
+
+        if aggregate:
+            values = OrderedDict(
+                (metric, np.sum(chunks[metric], axis=0) / iterations)
+                for metric in metrics
+            )
+            repeat = 1
+        else:
+            values = OrderedDict(
+                (metric, np.concatenate(chunks[metric]).ravel())
+                for metric in metrics
+            )
+            repeat = iterations
+
+        data = OrderedDict()
+        if not aggregate:
+            data['iteration'] = np.repeat(np.arange(iterations), len(receivers))
+
+        data.update([
+            ('id', np.tile(receivers.ids, repeat)),
+            ('path_loss', values['path_loss']),
+            ('r_model', 'fspl'),
+            ('ave_inf_pl', values['ave_inf_pl']),
+            ('received_power', values['received_power']),
+            ('distance', np.tile(r_distance, repeat)),
+            ('interference', values['interference']),
+            ('i_model', 'fspl'),
+            ('network_load', simulation_parameters['network_load']),
+            ('ave_distance', np.tile(interferer_distance.mean(axis=-1), repeat)),
+            ('noise', self.estimate_noise(bandwidth)),
+            ('i_plus_n', values['i_plus_n']),
+            ('tranmission_type', tranmission_type),
+            ('sinr', values['sinr']),
+            ('spectral_efficiency', values['spectral_efficiency']),
+            ('capacity_mbps', values['capacity_mbps']),
+            ('capacity_mbps_km2', values['capacity_mbps_km2']),
+            ('receiver_x', np.tile(receivers.coordinates[:, 0], repeat)),
+            ('receiver_y', np.tile(receivers.coordinates[:, 1], repeat)),
+            ('iterations', iterations),
+        ])
+
+        return LinkBudgetResults(data)
+
+
+    def transmitter_coordinates(self):
+        """
 
-        return results
+        Return the serving transmitter coordinates as a (1, 2) array.
+
+        """
+        return np.array([self.transmitter.coordinates], dtype=float)
+
+
+    def interfering_transmitter_coordinates(self):
+        """
+
+        Return the interfering transmitter coordinates as an (M, 2) array.
+
+        """
+        return np.array(
+            [i.coordinates for i in self.interfering_transmitters.values()],
+            dtype=float
+        ).reshape(-1, 2)
 
 
     def estimate_path_loss(self, receiver, frequency, environment,
@@ -341,6 +817,214 @@ class SimulationManager(object):
         return interference, 'fspl', ave_distance, ave_pl
 
 
+    def estimate_distances_batch(self, receiver_coordinates,
+        transmitter_coordinates, interferer_coordinates, k_interferers=None):
+        """
+
+        Calculate the receiver geometry shared by every spectrum band.
+
+        Each receiver is served by its closest transmitter, with a
+        minimum distance of 20 meters. As in the per-receiver path, no
+        minimum distance is applied to interfering transmitters.
+
+        When `k_interferers` is set, only the k nearest interferers of
+        each receiver are found, using an `InterfererIndex`, so the cost
+        grows with k rather than with the full layout. As all interfering
+        transmitters share the same EIRP, these are also the k strongest.
+
+        Parameters
+        ----------
+        receiver_coordinates : numpy.ndarray
+            (N, 2) array of receiver coordinates.
+        transmitter_coordinates : array_like
+            (M, 2) array of serving transmitter coordinates.
+        interferer_coordinates : array_like
+            (M, 2) array of interfering transmitter coordinates.
+        k_interferers : int, optional
+            Number of nearest interferers to consider per receiver. All
+            interferers are used by default.
+
+        Returns
+        -------
+        strt_distance : numpy.ndarray
+            (N,) straight line distance in meters to the serving
+            transmitter.
+        interferer_distance : numpy.ndarray
+            (N, M) distances in meters to the interfering transmitters,
+            or (N, k) when `k_interferers` is set.
+
+        """
+        transmitter_coordinates = np.asarray(
+            transmitter_coordinates, dtype=float).reshape(-1, 2)
+        interferer_coordinates = np.asarray(
+            interferer_coordinates, dtype=float).reshape(-1, 2)
+
+        strt_distance = np.maximum(
+            calculate_distance_matrix(
+                receiver_coordinates, transmitter_coordinates
+            ).min(axis=1),
+            20
+        )
+
+        if (k_interferers is None or
+            k_interferers >= len(interferer_coordinates)):
+            interferer_distance = calculate_distance_matrix(
+                receiver_coordinates, interferer_coordinates
+            )
+        else:
+            interferer_distance, indices = InterfererIndex(
+                interferer_coordinates).query(receiver_coordinates, k_interferers)
+
+        return strt_distance, interferer_distance
+
+
+    def estimate_path_loss_batch(self, strt_distance, frequency,
+        simulation_parameters, shadow_fading=None):
+        """
+
+        Vectorized `estimate_path_loss` for all receivers.
+
+        Parameters
+        ----------
+        strt_distance : numpy.ndarray
+            (N,) straight line distance in meters to the serving
+            transmitter.
+        frequency : float or numpy.ndarray
+            The carrier frequency (GHz), either a scalar or a (B, 1)
+            array of bands.
+        simulation_parameters : dict
+            A dict containing all simulation parameters necessary.
+        shadow_fading : numpy.ndarray, optional
+            Random variation to add to the free space path loss, e.g. an
+            (iterations, N) Monte Carlo draw. By default the variation of
+            `path_loss_calculator` is used.
+
+        Returns
+        -------
+        path_loss : numpy.ndarray
+            Estimated path loss in decibels, (N,) or (B, N), or the
+            broadcast shape of `shadow_fading`.
+        model : string
+            Specifies which propagation model was used.
+
+        """
+        if shadow_fading is None:
+            path_loss, variation = path_loss_calculator(
+                strt_distance,
+                frequency,
+                simulation_parameters
+            )
+        else:
+            path_loss = (
+                free_space_path_loss(strt_distance, frequency) + shadow_fading
+            )
+
+        return path_loss, 'fspl'
+
+
+    def estimate_received_power_batch(self, path_loss, receiver_gain,
+        receiver_losses, receiver_misc_losses, interferers=False):
+        """
+
+        Vectorized `estimate_received_power`.
+
+        Parameters
+        ----------
+        path_loss : numpy.ndarray
+            Path loss in decibels with receivers on the last axis, or on
+            the second to last axis when `interferers` is set.
+        receiver_gain : float or numpy.ndarray
+            Receiver antenna gain.
+        receiver_losses : float or numpy.ndarray
+            Receiver losses.
+        receiver_misc_losses : float or numpy.ndarray
+            Receiver miscellaneous losses.
+        interferers : bool
+            Whether the last axis of `path_loss` is interfering
+            transmitters.
+
+        Returns
+        -------
+        received_power : numpy.ndarray
+            UE received power, with the same shape as `path_loss`.
+
+        """
+        eirp = (
+            float(self.transmitter.power) +
+            float(self.transmitter.gain) -
+            float(self.transmitter.losses)
+        )
+
+        if interferers:
+            receiver_gain = _as_column(receiver_gain)
+            receiver_losses = _as_column(receiver_losses)
+            receiver_misc_losses = _as_column(receiver_misc_losses)
+
+        received_power = (eirp -
+            path_loss -
+            receiver_misc_losses +
+            receiver_gain -
+            receiver_losses
+        )
+
+        return received_power
+
+
+    def estimate_interference_batch(self, interferer_distance, frequency,
+        simulation_parameters, receiver_gain=0, receiver_losses=0,
+        receiver_misc_losses=0, shadow_fading=None):
+        """
+
+        Vectorized `estimate_interference` over an (N, M) distance matrix.
+
+        Parameters
+        ----------
+        interferer_distance : numpy.ndarray
+            (N, M) distances in meters to the interfering transmitters.
+        frequency : float or numpy.ndarray
+            The carrier frequency (GHz), either a scalar or a (B, 1, 1)
+            array of bands.
+        simulation_parameters : dict
+            A dict containing all simulation parameters necessary.
+        shadow_fading : numpy.ndarray, optional
+            Random variation to add to the free space path loss, e.g. an
+            (iterations, N, M) Monte Carlo draw. By default the variation
+            of `path_loss_calculator` is used.
+
+        Returns
+        -------
+        interference : numpy.ndarray
+            Received interference power in decibels, (N, M) or (B, N, M).
+        model : string
+            Specifies which propagation model was used.
+        ave_distance : numpy.ndarray
+            (N,) average distance in meters to the interfering
+            transmitters.
+        ave_pl : numpy.ndarray
+            Average path loss in decibels to the interfering transmitters,
+            (N,) or (B, N).
+
+        """
+        if shadow_fading is None:
+            path_loss, variation = path_loss_calculator(
+                interferer_distance, frequency, simulation_parameters)
+        else:
+            path_loss = (
+                free_space_path_loss(interferer_distance, frequency) +
+                shadow_fading
+            )
+
+        interference = self.estimate_received_power_batch(path_loss,
+            receiver_gain, receiver_losses, receiver_misc_losses,
+            interferers=True
+        )
+
+        ave_distance = interferer_distance.mean(axis=-1)
+        ave_pl = path_loss.mean(axis=-1)
+
+        return interference, 'fspl', ave_distance, ave_pl
+
+
     def estimate_noise(self, bandwidth):
         """
         Estimates the potential noise at the UE receiver.
@@ -444,6 +1128,62 @@ class SimulationManager(object):
         return received_power, raw_sum_of_interference, noise, i_plus_n, sinr
 
 
+    def estimate_sinr_batch(self, received_power, interference, noise,
+        simulation_parameters):
+        """
+
+        Vectorized `estimate_sinr`, summing the three strongest
+        interferers for each receiver.
+
+        Parameters
+        ----------
+        received_power : numpy.ndarray
+            UE received power in decibels, (N,) or (B, N).
+        interference : numpy.ndarray
+            Received interference power in decibels, (N, M) or (B, N, M).
+        noise : float or numpy.ndarray
+            Received noise at the UE receiver in decibels
+        simulation_parameters : dict
+            A dict containing all simulation parameters necessary.
+
+        Returns
+        -------
+        received_power : numpy.ndarray
+            UE received power in decibels.
+        raw_sum_of_interference : numpy.ndarray
+            Linear values of summed interference at the receiver.
+        noise : float
+            Received noise at the UE receiver in decibels.
+        i_plus_n : numpy.ndarray
+            Linear sum of interference plus noise.
+        sinr : numpy.ndarray
+            Signal-to-Interference-plus-Noise-Ratio (SINR) in decibels.
+
+        """
+        raw_received_power = 10**received_power
+
+        interference_list = -np.sort(-(10**interference), axis=-1)[..., :3]
+
+        # accumulate column by column to keep the summation order of
+        # the per-receiver path
+        i_summed = np.zeros(np.shape(received_power))
+        for column in range(interference_list.shape[-1]):
+            i_summed = i_summed + interference_list[..., column]
+
+        network_load = simulation_parameters['network_load']
+        raw_sum_of_interference = i_summed * (network_load/100)
+
+        raw_noise = 10**noise
+
+        i_plus_n = (raw_sum_of_interference + raw_noise)
+
+        sinr = np.round(np.log10(
+            raw_received_power / i_plus_n
+            ),2)
+
+        return received_power, raw_sum_of_interference, noise, i_plus_n, sinr
+
+
     def estimate_spectral_efficiency(self, sinr, generation,
         modulation_and_coding_lut):
         """
@@ -456,9 +1196,10 @@ class SimulationManager(object):
             Signal-to-Interference-plus-Noise-Ratio (SINR) in decibels.
         generation : string
             Either 4G or 5G dependent on technology.
-        modulation_and_coding_lut : list of tuples
+        modulation_and_coding_lut : dict
             A lookup table containing modulation and coding rates,
-            spectral efficiencies and SINR estimates.
+            spectral efficiencies and SINR estimates, either as lists of
+            tuples or as compiled `ModulationAndCodingLUT` objects.
 
         Returns
         -------
@@ -466,30 +1207,47 @@ class SimulationManager(object):
             Efficiency of information transfer in Bps/Hz
 
         """
-        lookup = modulation_and_coding_lut[generation]
+        lookup = compile_modulation_and_coding_lut(
+            modulation_and_coding_lut, generation
+        )
+
+        spectral_efficiency = float(lookup.spectral_efficiency(sinr))
 
-        spectral_efficiency = 0.1
-        for lower, upper in pairwise(lookup):
-            if lower[0] and upper[0] == generation:
+        return spectral_efficiency
 
-                lower_sinr = lower[6]
-                upper_sinr = upper[6]
 
-                if sinr >= lower_sinr and sinr < upper_sinr:
-                    spectral_efficiency = lower[5]
-                    return spectral_efficiency
+    def estimate_spectral_efficiency_batch(self, sinr, generation,
+        modulation_and_coding_lut):
+        """
+        Vectorized `estimate_spectral_efficiency`.
+
+        Each SINR value is mapped to the lower bin of the compiled lookup
+        table in a single `searchsorted` call.
+
+        Parameters
+        ----------
+        sinr : numpy.ndarray
+            Signal-to-Interference-plus-Noise-Ratio (SINR) in decibels.
+        generation : string
+            Either 4G or 5G dependent on technology.
+        modulation_and_coding_lut : dict
+            A lookup table containing modulation and coding rates,
+            spectral efficiencies and SINR estimates, either as lists of
+            tuples or as compiled `ModulationAndCodingLUT` objects.
 
-                highest_value = lookup[-1]
+        Returns
+        -------
+        spectral_efficiency : numpy.ndarray
+            Efficiency of information transfer in Bps/Hz
 
-                if sinr >= highest_value[6]:
-                    spectral_efficiency = highest_value[5]
-                    return spectral_efficiency
+        """
+        lookup = compile_modulation_and_coding_lut(
+            modulation_and_coding_lut, generation
+        )
 
-                lowest_value = lookup[0]
+        spectral_efficiency = lookup.spectral_efficiency(sinr)
 
-                if sinr < lowest_value[5]:
-                    spectral_efficiency = 0
-                    return spectral_efficiency
+        return spectral_efficiency
 
 
     def estimate_average_capacity(self, bandwidth, spectral_efficiency):
@@ -643,6 +1401,150 @@ class Receiver(object):
         self.indoor = data['properties']['indoor']
 
 
+class ReceiverSet(object):
+    """
+
+    Array-backed set of radio receivers (UE).
+
+    Coordinates are held as an (N, 2) array. Each receiver attribute is
+    stored once as a scalar when it is the same for every receiver, and
+    as a typed length N array otherwise.
+
+    Parameters
+    ----------
+    coordinates : array_like
+        (N, 2) array of receiver x and y coordinates.
+    ue_height : float or array_like
+        Receiver height in meters.
+    gain : float or array_like
+        Receiver antenna gain.
+    losses : float or array_like
+        Receiver losses.
+    misc_losses : float or array_like
+        Receiver miscellaneous losses.
+    indoor : bool or array_like
+        Whether each receiver is indoors.
+    ids : list, optional
+        Receiver ids. Defaults to 'id_0', 'id_1', etc.
+
+    """
+    def __init__(self, coordinates, ue_height, gain, losses, misc_losses,
+        indoor, ids=None):
+
+        self.coordinates = np.ascontiguousarray(
+            coordinates, dtype=float).reshape(-1, 2)
+
+        length = len(self.coordinates)
+
+        self.ue_height = _compact_attribute(ue_height, length, float)
+        self.gain = _compact_attribute(gain, length, float)
+        self.losses = _compact_attribute(losses, length, float)
+        self.misc_losses = _compact_attribute(misc_losses, length, float)
+        self.indoor = _compact_attribute(indoor, length, bool)
+
+        if ids is not None:
+            ids = np.asarray(ids)
+            if len(ids) != length:
+                raise ValueError('Expected {} receiver ids, got {}'.format(
+                    length, len(ids)))
+        self._ids = ids
+
+
+    def __len__(self):
+        return len(self.coordinates)
+
+
+    @property
+    def ids(self):
+        """
+
+        Receiver ids as an array of strings.
+
+        """
+        if self._ids is None:
+            return np.array(
+                ['id_{}'.format(idx) for idx in range(len(self))])
+
+        return self._ids
+
+
+    @classmethod
+    def from_geojson(cls, receivers):
+        """
+
+        Build a receiver set from a list of geojson receiver dicts.
+
+        Parameters
+        ----------
+        receivers : list of dicts
+            Contains a dict for each User Equipment (UE) receiver.
+
+        Returns
+        -------
+        receiver_set : ReceiverSet
+            Array-backed receivers.
+
+        """
+        properties = [receiver['properties'] for receiver in receivers]
+
+        ids = [p['ue_id'] for p in properties]
+        if ids == ['id_{}'.format(idx) for idx in range(len(ids))]:
+            ids = None
+
+        return cls(
+            [receiver['geometry']['coordinates'] for receiver in receivers],
+            ue_height=[p['ue_height'] for p in properties],
+            gain=[p['gain'] for p in properties],
+            losses=[p['losses'] for p in properties],
+            misc_losses=[p['misc_losses'] for p in properties],
+            indoor=[p['indoor'] for p in properties],
+            ids=ids,
+        )
+
+
+    def to_geojson(self):
+        """
+
+        Convert the receiver set to a list of geojson receiver dicts.
+
+        Returns
+        -------
+        receivers : list of dicts
+            Contains a dict for each User Equipment (UE) receiver.
+
+        """
+        length = len(self)
+        ids = self.ids.tolist()
+        columns = [
+            np.broadcast_to(value, (length,)).tolist() for value in (
+                self.misc_losses, self.gain, self.losses,
+                self.ue_height, self.indoor)
+        ]
+
+        receivers = []
+
+        for idx, (x, y) in enumerate(self.coordinates.tolist()):
+            misc_losses, gain, losses, ue_height, indoor = (
+                column[idx] for column in columns)
+            receivers.append({
+                'type': "Feature",
+                'geometry': {
+                    "type": "Point",
+                    "coordinates": [x, y],
+                },
+                'properties': {
+                    'ue_id': ids[idx],
+                    "misc_losses": misc_losses,
+                    "gain": gain,
+                    "losses": losses,
+                    "ue_height": ue_height,
+                    "indoor": indoor,
+                }
+            })
+
+        return receivers
+
+
 class SiteArea(object):
     """
 
@@ -667,6 +1569,212 @@ class SiteArea(object):
         return area
 
 
+class InterfererIndex(object):
+    """
+
+    Spatial index (KD-tree) over interfering transmitter coordinates.
+
+    Parameters
+    ----------
+    coordinates : array_like
+        (M, 2) array of interfering transmitter coordinates.
+
+    """
+    def __init__(self, coordinates):
+        self.coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        self.tree = cKDTree(self.coordinates)
+
+
+    def __len__(self):
+        return len(self.coordinates)
+
+
+    def query(self, receiver_coordinates, k):
+        """
+
+        Find the k nearest interferers for every receiver.
+
+        Parameters
+        ----------
+        receiver_coordinates : array_like
+            (N, 2) array of receiver coordinates.
+        k : int
+            Number of interferers to return per receiver.
+
+        Returns
+        -------
+        distances : numpy.ndarray
+            (N, k) distances in meters, nearest first.
+        indices : numpy.ndarray
+            (N, k) row indices into `coordinates`.
+
+        """
+        k = min(k, len(self))
+
+        receiver_coordinates = np.asarray(
+            receiver_coordinates, dtype=float).reshape(-1, 2)
+
+        distances, indices = self.tree.query(receiver_coordinates, k=k)
+
+        return (
+            np.asarray(distances).reshape(-1, k),
+            np.asarray(indices).reshape(-1, k)
+        )
+
+
+class ModulationAndCodingLUT(object):
+    """
+
+    Compiled modulation and coding lookup table for one generation.
+
+    The SINR thresholds and spectral efficiencies are held as sorted
+    arrays, so a whole array of SINR values can be mapped with a single
+    `searchsorted` call.
+
+    Parameters
+    ----------
+    lookup : list of tuples
+        Rows of (generation, mimo, cqi, modulation, coding rate,
+        spectral efficiency, sinr) for a single generation.
+
+    """
+    def __init__(self, lookup):
+        rows = sorted(lookup, key=lambda row: row[6])
+
+        self.generation = rows[0][0]
+        self.sinr_thresholds = np.array([row[6] for row in rows], dtype=float)
+        self.spectral_efficiencies = np.array(
+            [row[5] for row in rows], dtype=float)
+
+
+    def spectral_efficiency(self, sinr):
+        """
+
+        Map SINR values to spectral efficiency.
+
+        Values in [threshold_i, threshold_i+1) take the efficiency of
+        bin i, and values at or above the highest threshold take the
+        highest efficiency. Values below the lowest threshold return 0.
+        Matching the original per-receiver lookup, values above the
+        first bin but below the lowest spectral efficiency also return 0.
+
+        Parameters
+        ----------
+        sinr : float or array_like
+            Signal-to-Interference-plus-Noise-Ratio (SINR) in decibels.
+
+        Returns
+        -------
+        spectral_efficiency : numpy.ndarray
+            Efficiency of information transfer in Bps/Hz, with the same
+            shape as `sinr`.
+
+        """
+        sinr = np.asarray(sinr, dtype=float)
+
+        bins = np.searchsorted(self.sinr_thresholds, sinr, side='right') - 1
+
+        spectral_efficiency = np.where(
+            bins < 0, 0, self.spectral_efficiencies[np.clip(bins, 0, None)]
+        )
+
+        below_lowest = (
+            (bins != 0) &
+            (bins != len(self.sinr_thresholds) - 1) &
+            (sinr < self.spectral_efficiencies[0])
+        )
+
+        return np.where(below_lowest, 0, spectral_efficiency)
+
+
+_COMPILED_LUTS = {}
+
+
+def compile_modulation_and_coding_lut(modulation_and_coding_lut, generation):
+    """
+
+    Return the compiled lookup table for a generation, building it once
+    and reusing it across every radius and band in a sweep.
+
+    Parameters
+    ----------
+    modulation_and_coding_lut : dict
+        Lookup tables keyed by generation, either as lists of tuples or
+        already compiled `ModulationAndCodingLUT` objects.
+    generation : string
+        Either 4G or 5G dependent on technology.
+
+    Returns
+    -------
+    lookup : ModulationAndCodingLUT
+        Compiled lookup table.
+
+    """
+    lookup = modulation_and_coding_lut[generation]
+
+    if isinstance(lookup, ModulationAndCodingLUT):
+        return lookup
+
+    key = (generation, tuple(lookup))
+    if key not in _COMPILED_LUTS:
+        _COMPILED_LUTS[key] = ModulationAndCodingLUT(lookup)
+
+    return _COMPILED_LUTS[key]
+
+
+def calculate_distance_matrix(origins, destinations):
+    """
+
+    Calculate the straight line distance between every pair of points.
+
+    Parameters
+    ----------
+    origins : numpy.ndarray
+        (N, 2) array of x and y coordinates.
+    destinations : numpy.ndarray
+        (M, 2) array of x and y coordinates.
+
+    Returns
+    -------
+    distances : numpy.ndarray
+        (N, M) array of distances.
+
+    """
+    dx = origins[:, 0, np.newaxis] - destinations[np.newaxis, :, 0]
+    dy = origins[:, 1, np.newaxis] - destinations[np.newaxis, :, 1]
+
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def _as_column(value):
+    """
+    Reshape a per-receiver array to broadcast against an (N, M) array.
+    """
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 1:
+        return value[:, np.newaxis]
+    return value
+
+
+def _compact_attribute(value, length, dtype):
+    """
+    Store a receiver attribute as a scalar when uniform, else as an array.
+    """
+    if np.ndim(value) == 0:
+        return dtype(value)
+
+    value = np.asarray(value, dtype=dtype)
+
+    if len(value) != length:
+        raise ValueError('Expected {} receiver values, got {}'.format(
+            length, len(value)))
+
+    if length > 0 and (value == value[0]).all():
+        return value[0].item()
+
+    return value
+
+
 def pairwise(iterable):
     """
 
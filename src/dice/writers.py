@@ -0,0 +1,702 @@
+"""
+Output backends for full results tables.
+
+Each backend takes the link budget results of one sweep job at a time.
+The CSV backend writes one file per job, while the Parquet backend
+writes a single dataset partitioned by the constant columns, buffering
+rows into row groups. The capacity lookup table has its own buffered
+writer that stays open for a whole sweep.
+
+"""
+import io
+import os
+import csv
+import math
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from dice.results import LinkBudgetResults
+
+
+# output column name and the link budget result it is taken from
+FULL_RESULTS_FIELDS = OrderedDict([
+    ('receiver_x', 'receiver_x'),
+    ('receiver_y', 'receiver_y'),
+    ('r_distance', 'distance'),
+    ('path_loss_dB', 'path_loss'),
+    ('r_model', 'r_model'),
+    ('received_power_dB', 'received_power'),
+    ('interference_dB', 'interference'),
+    ('i_model', 'i_model'),
+    ('noise_dB', 'noise'),
+    ('sinr_dB', 'sinr'),
+    ('spectral_efficiency_bps_hz', 'spectral_efficiency'),
+    ('capacity_mbps', 'capacity_mbps'),
+    ('capacity_mbps_km2', 'capacity_mbps_km2'),
+])
+
+
+# column types of the constant columns when used as partition keys
+PARTITION_TYPES = {
+    'environment': 'string',
+    'inter_site_distance_m': 'int64',
+    'sites_per_km2': 'double',
+    'frequency_GHz': 'double',
+    'bandwidth_MHz': 'double',
+    'number_of_sectors': 'int64',
+    'generation': 'string',
+    'ant_type': 'string',
+    'transmittion_type': 'string',
+}
+
+
+def full_results_table(data, environment, site_radius, frequency, bandwidth,
+    generation, ant_type, transmittion_type, parameters):
+    """
+
+    Arrange link budget results into the columns of the full results
+    table, with the job description held once as constant columns.
+
+    Parameters
+    ----------
+    data : LinkBudgetResults
+        Contains all results ready to be written.
+    environment : string
+        Either urban, suburban or rural clutter type.
+    site_radius : int
+        Radius of site area in meters.
+    frequency : float
+        Spectral frequency of carrier band in GHz.
+    bandwidth : int
+        Channel bandwidth of carrier band in MHz.
+    generation : string
+        Either 4G or 5G depending on technology generation.
+    ant_type : string
+        The type of transmitter modelled (macro, micro etc.).
+    tranmission_type : string
+        The type of tranmission (SISO, MIMO 4x4, MIMO 8x8 etc.).
+    parameters : dict
+        Contains all necessary simulation parameters.
+
+    Returns
+    -------
+    table : LinkBudgetResults
+        Full results table, one row per receiver.
+
+    """
+    sectors = parameters['sectorization']
+    inter_site_distance = site_radius * 2
+    site_area_km2 = (
+        math.sqrt(3) / 2 * inter_site_distance ** 2 / 1e6
+    )
+    sites_per_km2 = 1 / site_area_km2
+
+    columns = OrderedDict([
+        ('environment', environment),
+        ('inter_site_distance_m', inter_site_distance),
+        ('sites_per_km2', sites_per_km2),
+        ('frequency_GHz', frequency),
+        ('bandwidth_MHz', bandwidth),
+        ('number_of_sectors', sectors),
+        ('generation', generation),
+        ('ant_type', ant_type),
+        ('transmittion_type', transmittion_type),
+    ])
+
+    for name, field in FULL_RESULTS_FIELDS.items():
+        if field in data.columns:
+            columns[name] = data.columns[field]
+        else:
+            columns[name] = data.constants[field]
+
+    return LinkBudgetResults(columns)
+
+
+def write_full_results_csv(table, path):
+    """
+
+    Write a full results table to .csv.
+
+    Parameters
+    ----------
+    table : LinkBudgetResults
+        Full results table, see `full_results_table`.
+    path : string
+        Path of the .csv file.
+
+    """
+    with open(path, 'w', newline='') as results_file:
+        results_writer = csv.writer(results_file)
+        results_writer.writerow(table.fields)
+        results_writer.writerows(
+            tuple(row[name] for name in table.fields) for row in table
+        )
+
+
+class CsvFullResultsWriter(object):
+    """
+
+    Write the full results of each job to its own .csv file.
+
+    Files are written independently, so jobs can be written from the
+    worker processes that ran them.
+
+    Parameters
+    ----------
+    directory : string
+        Folder the data will be written to.
+    parameters : dict
+        Contains all necessary simulation parameters.
+
+    """
+    parallel_safe = True
+
+    def __init__(self, directory, parameters):
+        self.directory = directory
+        self.parameters = parameters
+
+
+    def __call__(self, results, job):
+        self.write(results, job)
+
+
+    def write(self, results, job):
+        """
+
+        Write the results of one job.
+
+        Parameters
+        ----------
+        results : LinkBudgetResults
+            Contains all results ready to be written.
+        job : SweepJob
+            The environment, ant_type, site radius and band simulated.
+
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        filename = 'full_capacity_lut_{}_{}_{}_{}_{}_{}.csv'.format(
+            job.environment, job.site_radius, job.generation, job.frequency,
+            job.ant_type, job.transmission_type)
+
+        write_full_results_csv(
+            full_results_table(results, job.environment, job.site_radius,
+                job.frequency, job.bandwidth, job.generation, job.ant_type,
+                job.transmission_type, self.parameters),
+            os.path.join(self.directory, filename)
+        )
+
+
+    def close(self):
+        pass
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetFullResultsWriter(object):
+    """
+
+    Write the full results of all jobs to one partitioned Parquet dataset.
+
+    Rows are split into hive-style partitions (e.g.
+    environment=urban/frequency_GHz=0.8/) and buffered in memory until a
+    row group is full. The remaining constant columns are dictionary
+    encoded. Each partition file is written under a hidden name and only
+    renamed into place on `close`, so an interrupted run never leaves a
+    partial file in the dataset. Read slices back with
+    `read_full_results`.
+
+    Parameters
+    ----------
+    directory : string
+        Root folder of the dataset.
+    parameters : dict
+        Contains all necessary simulation parameters.
+    partition_cols : tuple of strings
+        Constant columns used as partition keys.
+    row_group_size : int
+        Number of rows buffered per partition before a row group is
+        written.
+
+    """
+    parallel_safe = False
+
+    def __init__(self, directory, parameters,
+        partition_cols=('environment', 'frequency_GHz'), row_group_size=250000):
+
+        self.directory = directory
+        self.parameters = parameters
+        self.partition_cols = tuple(partition_cols)
+        self.row_group_size = row_group_size
+
+        self.run_id = uuid.uuid4().hex
+        self.buffers = OrderedDict()
+        self.buffered_rows = OrderedDict()
+        self.writers = OrderedDict()
+
+
+    def __call__(self, results, job):
+        self.write(results, job)
+
+
+    def write(self, results, job):
+        """
+
+        Buffer the results of one job, writing a row group once the
+        partition buffer is full.
+
+        Parameters
+        ----------
+        results : LinkBudgetResults
+            Contains all results ready to be written.
+        job : SweepJob
+            The environment, ant_type, site radius and band simulated.
+
+        """
+        table = full_results_table(results, job.environment, job.site_radius,
+            job.frequency, job.bandwidth, job.generation, job.ant_type,
+            job.transmission_type, self.parameters)
+
+        partition = tuple(
+            (name, table.constants[name]) for name in self.partition_cols)
+
+        arrow_table = table.to_arrow().drop(list(self.partition_cols))
+
+        self.buffers.setdefault(partition, []).append(arrow_table)
+        self.buffered_rows[partition] = (
+            self.buffered_rows.get(partition, 0) + len(table))
+
+        if self.buffered_rows[partition] >= self.row_group_size:
+            self._flush(partition)
+
+
+    def flush(self):
+        """
+
+        Write all buffered rows.
+
+        """
+        for partition in list(self.buffers):
+            self._flush(partition)
+
+
+    def close(self):
+        """
+
+        Write all buffered rows and publish the partition files.
+
+        """
+        self.flush()
+
+        for partition, (writer, temp_path, path) in self.writers.items():
+            writer.close()
+            os.replace(temp_path, path)
+
+        self.writers = OrderedDict()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def _flush(self, partition):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tables = self.buffers.pop(partition, [])
+        self.buffered_rows.pop(partition, None)
+
+        if not tables:
+            return
+
+        table = pa.concat_tables(tables).unify_dictionaries()
+
+        if partition not in self.writers:
+            directory = os.path.join(self.directory, *[
+                '{}={}'.format(name, value) for name, value in partition])
+            os.makedirs(directory, exist_ok=True)
+
+            filename = 'part-{}.parquet'.format(self.run_id)
+            path = os.path.join(directory, filename)
+            temp_path = os.path.join(directory, '.' + filename)
+
+            self.writers[partition] = (
+                pq.ParquetWriter(temp_path, table.schema), temp_path, path)
+
+        self.writers[partition][0].write_table(
+            table, row_group_size=self.row_group_size)
+
+
+LUT_HEADER = (
+    'confidence_interval',
+    'environment',
+    'inter_site_distance_m',
+    'site_area_km2',
+    'sites_per_km2',
+    'frequency_GHz',
+    'bandwidth_MHz',
+    'number_of_sectors',
+    'generation',
+    'ant_type',
+    'transmission_type',
+    'path_loss_dB',
+    'received_power_dBm',
+    'interference_dBm',
+    'noise_dB',
+    'sinr_dB',
+    'spectral_efficiency_bps_hz',
+    'capacity_mbps',
+    'capacity_mbps_km2',
+)
+
+
+def lut_rows(results, environment, site_radius, frequency, bandwidth,
+    generation, ant_type, tranmission_type, parameters):
+    """
+
+    Format percentile results as rows of the capacity lookup table.
+
+    Parameters
+    ----------
+    results : list of dicts
+        Percentile values for each confidence interval.
+    environment : string
+        Either urban, suburban or rural clutter type.
+    site_radius : int
+        Radius of site area in meters.
+    frequency : float
+        Spectral frequency of carrier band in GHz.
+    bandwidth : int
+        Channel bandwidth of carrier band in MHz.
+    generation : string
+        Either 4G or 5G depending on technology generation.
+    ant_type : string
+        Type of transmitters modelled.
+    tranmission_type : string
+        The transmission type (SISO, MIMO etc.).
+    parameters : dict
+        Contains all necessary simulation parameters.
+
+    Returns
+    -------
+    rows : list of tuples
+        One row per confidence interval, in the order of `LUT_HEADER`.
+
+    """
+    inter_site_distance = site_radius * 2
+    site_area_km2 = math.sqrt(3) / 2 * inter_site_distance ** 2 / 1e6
+    sites_per_km2 = 1 / site_area_km2
+
+    sectors = parameters['sectorization']
+
+    rows = []
+
+    for result in results:
+        rows.append(
+            (
+                result['confidence_interval'],
+                environment,
+                inter_site_distance,
+                site_area_km2,
+                sites_per_km2,
+                frequency,
+                bandwidth,
+                sectors,
+                generation,
+                ant_type,
+                tranmission_type,
+                result['path_loss'],
+                result['received_power'],
+                result['interference'],
+                result['noise'],
+                result['sinr'],
+                result['spectral_efficiency'],
+                result['capacity_mbps'],
+                result['capacity_mbps_km2'] * sectors,
+            )
+        )
+
+    return rows
+
+
+class LutWriter(object):
+    """
+
+    Capacity lookup table writer that stays open for a whole sweep.
+
+    Rows are batched in memory and written once `flush_rows` rows are
+    buffered or `flush_interval` seconds have passed since the last
+    write. A new table is written to a temporary file and only moved into
+    place on `close`, so the table is never seen half written. When
+    appending to an existing table, each batch is written and synced in
+    one go, and a partial last row left by a crash is removed on opening.
+
+    Parameters
+    ----------
+    path : string
+        Path of the .csv file.
+    header : tuple of strings
+        Column names, written when the table is created.
+    append : bool
+        If True, add rows to an existing table rather than replacing it.
+    flush_rows : int
+        Number of buffered rows that triggers a write.
+    flush_interval : float
+        Seconds after which buffered rows are written.
+    background : bool
+        If True, rows are formatted and written on a background thread,
+        so writing overlaps with simulation.
+
+    """
+    def __init__(self, path, header=LUT_HEADER, append=False,
+        flush_rows=1000, flush_interval=30, background=False):
+
+        self.path = path
+        self.append = append
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if append:
+            self.temp_path = None
+            if os.path.exists(path):
+                _truncate_partial_line(path)
+            self.file = open(path, 'a', newline='')
+        else:
+            self.temp_path = '{}.tmp'.format(path)
+            self.file = open(self.temp_path, 'w', newline='')
+
+        if self.file.tell() == 0:
+            self.file.write(_format_csv_rows([header]))
+
+        self.buffer = []
+        self.last_flush = time.time()
+
+        self.thread = None
+        self.error = None
+        if background:
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+
+    def write(self, rows):
+        """
+
+        Add rows to the table.
+
+        Parameters
+        ----------
+        rows : list of tuples
+            Rows in the order of the header.
+
+        """
+        if self.thread is not None:
+            self._raise_error()
+            self.queue.put(list(rows))
+            return
+
+        self._add(rows)
+
+
+    def flush(self):
+        """
+
+        Write all buffered rows.
+
+        """
+        if self.thread is not None:
+            self.queue.put(_FLUSH)
+            self.queue.join()
+            self._raise_error()
+            return
+
+        self._flush()
+
+
+    def close(self):
+        """
+
+        Write all buffered rows, close the file and, for a new table, move
+        it into place.
+
+        """
+        if self.thread is not None:
+            self.queue.put(_CLOSE)
+            self.thread.join()
+            self.thread = None
+            self._raise_error()
+
+        self._flush()
+        self.file.close()
+
+        if self.temp_path is not None:
+            os.replace(self.temp_path, self.path)
+
+
+    def abort(self):
+        """
+
+        Stop writing after an error. A new table is discarded, while rows
+        already appended to an existing table are kept.
+
+        """
+        if self.thread is not None:
+            self.queue.put(_CLOSE)
+            self.thread.join()
+            self.thread = None
+
+        self.file.close()
+
+        if self.temp_path is not None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+    def _add(self, rows):
+        self.buffer.extend(rows)
+
+        if (len(self.buffer) >= self.flush_rows or
+            time.time() - self.last_flush >= self.flush_interval):
+            self._flush()
+
+
+    def _flush(self):
+        if self.buffer:
+            self.file.write(_format_csv_rows(self.buffer))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.buffer = []
+
+        self.last_flush = time.time()
+
+
+    def _run(self):
+        while True:
+            timeout = max(
+                self.flush_interval - (time.time() - self.last_flush), 0)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            try:
+                if self.error is None:
+                    if item is None or item is _FLUSH or item is _CLOSE:
+                        self._flush()
+                    else:
+                        self._add(item)
+            except Exception as error:
+                self.error = error
+            finally:
+                if item is not None:
+                    self.queue.task_done()
+
+            if item is _CLOSE:
+                return
+
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+
+_FLUSH = object()
+_CLOSE = object()
+
+
+def _format_csv_rows(rows):
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue()
+
+
+def _truncate_partial_line(path):
+    """
+    Remove anything after the last newline of a file, i.e. a row cut
+    short by a crash.
+    """
+    with open(path, 'r+b') as existing:
+        content = existing.read()
+        complete = content.rfind(b'\n') + 1
+        if complete < len(content):
+            existing.truncate(complete)
+
+
+def read_full_results(directory, filters=None, columns=None):
+    """
+
+    Read a slice of a full results Parquet dataset. Filters on partition
+    keys skip whole directories, and filters on other columns are pushed
+    down to the row group statistics.
+
+    Parameters
+    ----------
+    directory : string
+        Root folder of the dataset.
+    filters : list of tuples, optional
+        Predicates as (column, op, value), e.g.
+        [('environment', '=', 'urban'), ('frequency_GHz', '=', 0.8)].
+    columns : list of strings, optional
+        Columns to read.
+
+    Returns
+    -------
+    table : pyarrow.Table
+        Matching rows.
+
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    # partition keys are only stored in directory names, so give them
+    # their column types rather than have them inferred as strings
+    fields = []
+    path = directory
+    while True:
+        keys = sorted(
+            entry for entry in os.listdir(path)
+            if '=' in entry and os.path.isdir(os.path.join(path, entry))
+        )
+        if not keys:
+            break
+        name = keys[0].split('=', 1)[0]
+        fields.append((name, PARTITION_TYPES.get(name, 'string')))
+        path = os.path.join(path, keys[0])
+
+    partitioning = ds.partitioning(
+        pa.schema([(name, pa.type_for_alias(type_name))
+            for name, type_name in fields]),
+        flavor='hive')
+
+    return pq.read_table(directory, columns=columns, filters=filters,
+        partitioning=partitioning)